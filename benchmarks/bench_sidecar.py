@@ -0,0 +1,73 @@
+"""
+Load test for the signing sidecar: concurrent sign() callers vs one round trip each.
+
+Starts the reference sidecar (talos-ucp-signer) with a throwaway key unless
+--socket points at a running one.
+
+    PYTHONPATH=src python benchmarks/bench_sidecar.py --threads 32 --requests 5000
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from talos_ucp_connector.adapters.infrastructure.sidecar import SidecarRequestSigner
+
+def start_reference_sidecar(directory: str) -> "tuple[subprocess.Popen, str]":
+    key_path = os.path.join(directory, "key.pem")
+    socket_path = os.path.join(directory, "signer.sock")
+    with open(key_path, "wb") as f:
+        f.write(ec.generate_private_key(ec.SECP256R1()).private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=serialization.NoEncryption(),
+        ))
+    proc = subprocess.Popen([
+        sys.executable, "-m", "talos_ucp_connector.adapters.infrastructure.sidecar",
+        "--socket", socket_path, "--key", f"bench-key={key_path}",
+    ])
+    for _ in range(100):
+        if os.path.exists(socket_path):
+            break
+        time.sleep(0.05)
+    return proc, socket_path
+
+def run(label: str, signer: SidecarRequestSigner, threads: int, requests: int) -> None:
+    envelopes = [{"method": "GET", "path": f"/orders/ord_{i}", "meta": {"jti": str(i)}} for i in range(requests)]
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(lambda e: signer.sign(e, "bench-key"), envelopes[:threads]))  # warm up
+        start = time.perf_counter()
+        list(pool.map(lambda e: signer.sign(e, "bench-key"), envelopes))
+        elapsed = time.perf_counter() - start
+    print(f"{label:<28} {requests / elapsed:>10.0f} sig/s  ({elapsed * 1000:.1f} ms, {next(signer._ids) - 1} frames)")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--socket", help="Existing sidecar socket (must hold 'bench-key')")
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    proc = None
+    with tempfile.TemporaryDirectory(prefix="ucp-") as directory:
+        socket_path = args.socket
+        if socket_path is None:
+            proc, socket_path = start_reference_sidecar(directory)
+        try:
+            for label, max_batch, window in (("unbatched (max_batch=1)", 1, 0.0), ("batched (64, 1ms window)", 64, 0.001)):
+                signer = SidecarRequestSigner(socket_path, max_batch=max_batch, batch_window=window)
+                try:
+                    run(label, signer, args.threads, args.requests)
+                finally:
+                    signer.close()
+        finally:
+            if proc is not None:
+                proc.terminate()
+                proc.wait()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Micro-benchmarks for the request signing hot path, by cart size.
+
+Each stage is timed for ops/sec and traced once with tracemalloc for the peak
+memory it allocates per operation. Results can be saved as a baseline and
+later runs compared against it:
+
+    PYTHONPATH=src python benchmarks/bench_signing.py --save
+    PYTHONPATH=src python benchmarks/bench_signing.py --compare
+    PYTHONPATH=src python benchmarks/bench_signing.py --sizes 1 100 --stages sign.es256
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import timeit
+import tracemalloc
+from typing import Any, Callable, Dict, List
+import rfc8785
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+from talos_ucp_connector.adapters.infrastructure.security import RequestSigner, Ed25519RequestSigner
+from talos_ucp_connector.domain.helpers import CanonicalJSON, EnvelopeCanonicalizer, RequestTemplate, SigningHelper
+
+DEFAULT_SIZES = [1, 10, 100, 1000, 10000]
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baselines", "signing.json")
+
+UCP_AGENT = 'profile="https://talos.example.com/.well-known/ucp", version="2026-01-11"'
+
+def _pem(private_key) -> str:
+    return private_key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption(),
+    ).decode("ascii")
+
+def make_cart(items: int) -> Dict[str, Any]:
+    return {
+        "line_items": [
+            {
+                "item": {"id": f"sku_{i:06d}", "title": f"Item {i}", "price": 1999 + i},
+                "quantity": 1 + i % 3,
+            }
+            for i in range(items)
+        ],
+        "currency": "USD",
+        "mode": "payment",
+    }
+
+def build_stages(items: int) -> Dict[str, Callable[[], Any]]:
+    """One zero-argument callable per stage, with inputs prepared up front."""
+    cart = make_cart(items)
+    headers = {"UCP-Agent": UCP_AGENT, "Content-Type": "application/json", "Idempotency-Key": "idem-1"}
+    envelope = SigningHelper.create_envelope("POST", "/checkout-sessions", {}, headers, cart, 1700000000, "jti-1")
+    template = RequestTemplate.build("https://talos.example.com/.well-known/ucp", "https://api.merchant.com")
+    dynamic = {"Talos-Signature-Meta": 'iat=1700000000,jti="jti-1"', "Idempotency-Key": "idem-1"}
+    body = CanonicalJSON.encode(cart)
+    template_envelope = SigningHelper.create_envelope_from_template(
+        template, "POST", "/checkout-sessions", {}, dynamic, body, 1700000000, "jti-1")
+    es256 = RequestSigner(_pem(ec.generate_private_key(ec.SECP256R1())))
+    eddsa = Ed25519RequestSigner(_pem(ed25519.Ed25519PrivateKey.generate()))
+
+    return {
+        "canonicalize_ucp_agent": lambda: SigningHelper.canonicalize_ucp_agent(UCP_AGENT),
+        "create_envelope": lambda: SigningHelper.create_envelope(
+            "POST", "/checkout-sessions", {}, headers, cart, 1700000000, "jti-1"),
+        "body.jcs_encode": lambda: CanonicalJSON.encode(cart),
+        "envelope.from_template": lambda: SigningHelper.create_envelope_from_template(
+            template, "POST", "/checkout-sessions", {}, dynamic, body, 1700000000, "jti-1"),
+        "envelope.rfc8785_dumps": lambda: rfc8785.dumps(envelope),
+        "envelope.canonicalizer_dumps": lambda: EnvelopeCanonicalizer.dumps(template_envelope),
+        "body.content_digest": lambda: SigningHelper.content_digest(body),
+        "sign.es256": lambda: es256.sign(template_envelope, "bench-key"),
+        "sign.eddsa": lambda: eddsa.sign(template_envelope, "bench-key"),
+    }
+
+def measure(fn: Callable[[], Any], min_time: float) -> Dict[str, float]:
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    # Best of a few repeats, each at least ~min_time / 3 long
+    number = max(number, int(number * (min_time / 3) / 0.2))
+    best = min(timer.repeat(repeat=3, number=number)) / number
+
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"ops_per_sec": round(1 / best, 1), "peak_alloc_kib": round((peak - base) / 1024, 1)}
+
+def run(sizes: List[int], stages: List[str], min_time: float) -> Dict[str, Dict[str, Dict[str, float]]]:
+    results: Dict[str, Dict[str, Dict[str, float]]] = {}
+    print(f"{'stage':<30}{'items':>7}{'ops/sec':>14}{'peak KiB':>11}")
+    for items in sizes:
+        available = build_stages(items)
+        for name in stages or available:
+            stats = measure(available[name], min_time)
+            results.setdefault(name, {})[str(items)] = stats
+            print(f"{name:<30}{items:>7}{stats['ops_per_sec']:>14,.1f}{stats['peak_alloc_kib']:>11,.1f}")
+    return results
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], max_regression: float) -> bool:
+    ok = True
+    print(f"\n{'stage':<30}{'items':>7}{'baseline':>14}{'now':>14}{'change':>9}")
+    for name, by_size in results.items():
+        for items, stats in by_size.items():
+            before = baseline.get("results", {}).get(name, {}).get(items)
+            if before is None:
+                continue
+            change = stats["ops_per_sec"] / before["ops_per_sec"] - 1
+            flag = ""
+            if change < -max_regression:
+                flag, ok = "  REGRESSION", False
+            print(f"{name:<30}{items:>7}{before['ops_per_sec']:>14,.1f}{stats['ops_per_sec']:>14,.1f}{change:>+9.1%}{flag}")
+    return ok
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Cart sizes (line items)")
+    parser.add_argument("--stages", nargs="+", default=[], help="Subset of stages to run")
+    parser.add_argument("--min-time", type=float, default=0.6, help="Approximate seconds per measurement")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save", action="store_true", help="Write results as the new baseline")
+    parser.add_argument("--compare", action="store_true", help="Compare against the baseline")
+    parser.add_argument("--max-regression", type=float, default=0.2,
+                        help="With --compare, exit 1 if ops/sec drops by more than this fraction")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.stages, args.min_time)
+
+    if args.compare:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if not compare(results, baseline, args.max_regression):
+            sys.exit(1)
+    if args.save:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({
+                "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "python": platform.python_version(),
+                "machine": f"{platform.system()} {platform.machine()}, {os.cpu_count()} cpu",
+                "results": results,
+            }, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\nBaseline written to {args.baseline}")
+
+if __name__ == "__main__":
+    main()
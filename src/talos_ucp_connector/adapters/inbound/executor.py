@@ -0,0 +1,130 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+class ServiceExecutor:
+    """
+    Bridges async MCP tools onto the synchronous CommerceService.
+    Calls run on a bounded thread pool; each merchant additionally gets its own
+    concurrency cap so one slow merchant cannot occupy every worker.
+    """
+    def __init__(self, max_workers: int = 32, per_merchant_limit: int = 8):
+        if max_workers < 1 or per_merchant_limit < 1:
+            raise ValueError("max_workers and per_merchant_limit must be >= 1")
+        self.max_workers = max_workers
+        self.per_merchant_limit = per_merchant_limit
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ucp-service")
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._users: Dict[str, int] = {}
+
+        # Metrics (guarded by _lock; updated from both the loop and pool threads)
+        self._lock = threading.Lock()
+        self._waiting: Dict[str, int] = {}
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+
+    def _merchant_semaphore(self, merchant_domain: str) -> asyncio.Semaphore:
+        # Counts callers waiting on or holding the semaphore; idle ones are dropped
+        self._users[merchant_domain] = self._users.get(merchant_domain, 0) + 1
+        sem = self._semaphores.get(merchant_domain)
+        if sem is None:
+            sem = asyncio.Semaphore(self.per_merchant_limit)
+            self._semaphores[merchant_domain] = sem
+        return sem
+
+    def _release_user(self, merchant_domain: str) -> None:
+        count = self._users[merchant_domain] - 1
+        if count:
+            self._users[merchant_domain] = count
+        else:
+            del self._users[merchant_domain]
+            del self._semaphores[merchant_domain]
+
+    def _release(self, merchant_domain: str, sem: asyncio.Semaphore) -> None:
+        sem.release()
+        self._release_user(merchant_domain)
+
+    def _on_done(self, loop: asyncio.AbstractEventLoop, merchant_domain: str, sem: asyncio.Semaphore,
+                 future: "Future[Any]") -> None:
+        if future.cancelled():
+            # Never reached _invoke
+            with self._lock:
+                self._queued -= 1
+        try:
+            loop.call_soon_threadsafe(self._release, merchant_domain, sem)
+        except RuntimeError:
+            pass  # loop already closed
+
+    def _adjust_waiting(self, merchant_domain: str, delta: int) -> None:
+        with self._lock:
+            count = self._waiting.get(merchant_domain, 0) + delta
+            if count:
+                self._waiting[merchant_domain] = count
+            else:
+                self._waiting.pop(merchant_domain, None)
+
+    def _invoke(self, fn: Callable[[], T]) -> T:
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+        ok = False
+        try:
+            result = fn()
+            ok = True
+            return result
+        finally:
+            with self._lock:
+                self._running -= 1
+                if ok:
+                    self._completed += 1
+                else:
+                    self._failed += 1
+
+    async def run(self, merchant_domain: str, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Runs fn(*args, **kwargs) on the pool under the merchant's concurrency cap."""
+        loop = asyncio.get_running_loop()
+        sem = self._merchant_semaphore(merchant_domain)
+        self._adjust_waiting(merchant_domain, 1)
+        try:
+            await sem.acquire()
+        except BaseException:
+            self._release_user(merchant_domain)
+            raise
+        finally:
+            self._adjust_waiting(merchant_domain, -1)
+
+        with self._lock:
+            self._queued += 1
+        try:
+            future = self._pool.submit(self._invoke, functools.partial(fn, *args, **kwargs))
+        except BaseException:
+            with self._lock:
+                self._queued -= 1
+            self._release(merchant_domain, sem)
+            raise
+        # The slot is held until the pool call itself finishes (or is cancelled
+        # before starting), not just until this caller stops waiting
+        future.add_done_callback(functools.partial(self._on_done, loop, merchant_domain, sem))
+        return await asyncio.wrap_future(future, loop=loop)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Point-in-time queue depth and throughput counters."""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "per_merchant_limit": self.per_merchant_limit,
+                "queued": self._queued,
+                "running": self._running,
+                "completed": self._completed,
+                "failed": self._failed,
+                "waiting_by_merchant": dict(self._waiting),
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait)
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Any, Dict, Optional
 
 from mcp.server.fastmcp import FastMCP
 import os
@@ -17,12 +17,42 @@ CONFIG = {
     "platform_profile_uri": "talos-gateway-v1",
     "security": {
         "kid": "talos-dev-key-1"
+    },
+    "discovery": {
+        "cache_dir": os.getenv("UCP_DISCOVERY_CACHE_DIR")
+    },
+    "prewarm": {
+        "enabled": os.getenv("UCP_PREWARM", "false").lower() == "true",
+        "deadline_seconds": float(os.getenv("UCP_PREWARM_DEADLINE", "10"))
+    },
+    "signing": {
+        "workers": int(os.getenv("UCP_SIGNING_WORKERS", "0")),
+        "sidecar_socket": os.getenv("UCP_SIGNER_SOCKET"),
+        "sidecar_algorithm": os.getenv("UCP_SIGNER_ALG", "ES256")
+    },
+    "replay": {
+        "sqlite_path": os.getenv("UCP_REPLAY_DB"),
+        "shared_memory": {"name": os.getenv("UCP_REPLAY_SHM")} if os.getenv("UCP_REPLAY_SHM") else None
+    },
+    "executor": {
+        "max_workers": int(os.getenv("UCP_EXECUTOR_WORKERS", "32")),
+        "per_merchant_limit": int(os.getenv("UCP_EXECUTOR_PER_MERCHANT", "8"))
     }
 }
 
-# Bootstrapping
-container = Container(CONFIG)
-service = container.service
+# Bootstrapping happens in main(), not at import: signing worker processes
+# (spawn) re-import this module as __mp_main__ and must not build a Container
+container: Optional[Container] = None
+service: Any = None
+executor: Any = None
+
+def bootstrap(config: Optional[Dict[str, Any]] = None) -> Container:
+    global container, service, executor
+    if container is None:
+        container = Container(config if config is not None else CONFIG)
+        service = container.service
+        executor = container.executor
+    return container
 
 
 @mcp.tool()
@@ -36,7 +66,7 @@ async def ucp_checkout_create(
     Creates a new UCP checkout session.
     """
     try:
-        return service.create_checkout(merchant_domain, line_items, currency, extensions)
+        return await executor.run(merchant_domain, service.create_checkout, merchant_domain, line_items, currency, extensions)
     except Exception as e:
         return {"error": str(e), "code": "UCP_CREATE_FAILED"}
 
@@ -47,7 +77,7 @@ async def ucp_checkout_get(merchant_domain: str, session_id: str):
     Retrieves an existing UCP checkout session.
     """
     try:
-        return service.get_checkout(merchant_domain, session_id)
+        return await executor.run(merchant_domain, service.get_checkout, merchant_domain, session_id)
     except Exception as e:
         return {"error": str(e), "code": "UCP_GET_FAILED"}
 
@@ -63,7 +93,7 @@ async def ucp_checkout_update(
     Updates an existing UCP checkout session (PUT semantic).
     """
     try:
-        return service.update_checkout(merchant_domain, session_id, checkout_payload, extensions)
+        return await executor.run(merchant_domain, service.update_checkout, merchant_domain, session_id, checkout_payload, extensions)
     except Exception as e:
         return {"error": str(e), "code": "UCP_UPDATE_FAILED"}
 
@@ -79,7 +109,7 @@ async def ucp_checkout_complete(
     Completes a UCP checkout session by providing platform credentials.
     """
     try:
-        return service.complete_checkout(merchant_domain, session_id, amount_minor, currency)
+        return await executor.run(merchant_domain, service.complete_checkout, merchant_domain, session_id, amount_minor, currency)
     except Exception as e:
         return {"error": str(e), "code": "UCP_COMPLETE_FAILED"}
 
@@ -90,7 +120,7 @@ async def ucp_checkout_cancel(merchant_domain: str, session_id: str):
     Cancels an active UCP checkout session.
     """
     try:
-        return service.cancel_checkout(merchant_domain, session_id)
+        return await executor.run(merchant_domain, service.cancel_checkout, merchant_domain, session_id)
     except Exception as e:
         return {"error": str(e), "code": "UCP_CANCEL_FAILED"}
 
@@ -101,7 +131,7 @@ async def ucp_order_get(merchant_domain: str, order_id: str):
     Retrieves a UCP order by ID.
     """
     try:
-        return service.get_order(merchant_domain, order_id)
+        return await executor.run(merchant_domain, service.get_order, merchant_domain, order_id)
     except Exception as e:
         return {"error": str(e), "code": "UCP_ORDER_GET_FAILED"}
 
@@ -112,7 +142,7 @@ async def ucp_order_list(merchant_domain: str, limit: int = 100):
     Lists recent UCP orders for the merchant.
     """
     try:
-        return service.list_orders(merchant_domain, limit)
+        return await executor.run(merchant_domain, service.list_orders, merchant_domain, limit)
     except Exception as e:
         return {"error": str(e), "code": "UCP_ORDER_LIST_FAILED"}
 
@@ -123,7 +153,7 @@ async def ucp_identity_link(merchant_domain: str, principal_id: str, ucp_buyer_i
     Links a Talos principal to a UCP merchant buyer identity.
     """
     try:
-        return service.link_identity(merchant_domain, principal_id, ucp_buyer_id)
+        return await executor.run(merchant_domain, service.link_identity, merchant_domain, principal_id, ucp_buyer_id)
     except Exception as e:
         return {"error": str(e), "code": "UCP_IDENTITY_LINK_FAILED"}
 
@@ -134,12 +164,13 @@ async def ucp_discover(merchant_did: str):
     Fetches the /.well-known/ucp manifest to discover merchant capabilities.
     """
     try:
-        return service.discover_merchant(merchant_did)
+        return await executor.run(merchant_did, service.discover_merchant, merchant_did)
     except Exception as e:
         return {"error": str(e), "code": "UCP_DISCOVER_FAILED"}
 
 
 def main():
+    bootstrap()
     transport = os.getenv("MCP_TRANSPORT", "stdio")
     if transport == "sse":
         port = int(os.getenv("PORT", "8084"))
@@ -1,6 +1,12 @@
+import hashlib
 import json
-from typing import Dict, Any
-from talos_ucp_connector.ports.spi import ConfigStorePort, AuditPort
+import logging
+import os
+import tempfile
+from typing import Dict, Any, List
+from talos_ucp_connector.ports.spi import ConfigStorePort, AuditPort, DiscoveryCacheStorePort
+
+logger = logging.getLogger(__name__)
 
 class ConfigStoreAdapter(ConfigStorePort):
     def __init__(self, config: Dict[str, Any]):
@@ -15,6 +21,9 @@ class ConfigStoreAdapter(ConfigStorePort):
     def is_merchant_allowlisted(self, merchant_domain: str) -> bool:
         return merchant_domain in self.merchants
 
+    def list_allowlisted_merchants(self) -> List[str]:
+        return list(self.merchants)
+
 class AuditAdapter(AuditPort):
     def emit_event(self, event_type: str, data: Dict[str, Any]) -> None:
         # For prototype, we log to stdout/file. In production, this goes to Audit Service.
@@ -23,3 +32,79 @@ class AuditAdapter(AuditPort):
             "data": data
         }
         print(f"[AUDIT] {json.dumps(event)}")
+
+class FileDiscoveryCacheStore(DiscoveryCacheStorePort):
+    """
+    One JSON file per merchant under `directory`, replaced atomically.
+    Per-merchant files keep a write O(1) no matter how many merchants are cached.
+    Storage errors are logged and never fail a request.
+    """
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, merchant_domain: str) -> str:
+        digest = hashlib.sha256(merchant_domain.encode("utf-8")).hexdigest()[:32]
+        return os.path.join(self.directory, f"{digest}.json")
+
+    def load_all(self) -> Dict[str, Dict[str, Any]]:
+        records: Dict[str, Dict[str, Any]] = {}
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    record = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning("Skipping unreadable discovery cache file %s: %s", path, e)
+                continue
+            if not self._valid(record):
+                # Truncated or hand-edited; it would only fail again on the next start
+                logger.warning("Removing malformed discovery cache file %s", path)
+                self._remove(path)
+                continue
+            records[record["merchant_domain"]] = record
+        return records
+
+    @staticmethod
+    def _valid(record: Any) -> bool:
+        def is_time(value: Any) -> bool:
+            return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+        return (
+            isinstance(record, dict)
+            and isinstance(record.get("merchant_domain"), str)
+            and isinstance(record.get("profile"), dict)
+            and is_time(record.get("fresh_until"))
+            and is_time(record.get("stale_until"))
+        )
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def save(self, merchant_domain: str, record: Dict[str, Any]) -> None:
+        path = self._path(merchant_domain)
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump({"merchant_domain": merchant_domain, **record}, f)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning("Could not persist discovery profile for %s: %s", merchant_domain, e)
+
+    def delete(self, merchant_domain: str) -> None:
+        try:
+            os.remove(self._path(merchant_domain))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning("Could not remove discovery profile for %s: %s", merchant_domain, e)
@@ -1,48 +1,195 @@
-import base64
-from typing import Dict, Any, Optional
+import asyncio
+import binascii
+import functools
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
 from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
 from cryptography.hazmat.primitives import serialization
 from cryptography.hazmat.primitives.asymmetric.utils import decode_dss_signature
 import rfc8785
+from talos_ucp_connector.domain.helpers import EnvelopeCanonicalizer
 from talos_ucp_connector.ports.spi import RequestSignerPort
 
+_URLSAFE = bytes.maketrans(b"+/", b"-_")
+
+def b64url(data: bytes) -> bytes:
+    """Unpadded base64url, staying in bytes."""
+    encoded = binascii.b2a_base64(data, newline=False)
+    size = (len(data) * 4 + 2) // 3
+    return (encoded if size == len(encoded) else encoded[:size]).translate(_URLSAFE)
+
+@functools.lru_cache(maxsize=256)
+def _encoded_header(alg: str, kid: str) -> Tuple[str, bytes]:
+    # The protected header only depends on (alg, kid)
+    encoded = b64url(rfc8785.dumps({"alg": alg, "kid": kid, "typ": "JOSE"}))
+    return encoded.decode('ascii'), encoded
+
+def _jws_signing_input(header: bytes, payload: bytes) -> bytes:
+    # header "." base64url(payload) in a single join: the padded encoding is
+    # sliced through a memoryview and the output is sized once
+    encoded = binascii.b2a_base64(payload, newline=False)
+    size = (len(payload) * 4 + 2) // 3
+    return b".".join((header, memoryview(encoded)[:size])).translate(_URLSAFE)
+
 class RequestSigner(RequestSignerPort):
     """
     Implements UCP-compliant Request signing (Option A).
     Uses ES256 and detached JCS-canonicalized envelope.
     """
+    ALG = "ES256"
+    KEY_TYPE: Any = ec.EllipticCurvePrivateKey
+
     def __init__(self, private_key_pem: str):
         self.private_key = serialization.load_pem_private_key(
             private_key_pem.encode('ascii'), 
             password=None
         )
+        if not isinstance(self.private_key, self.KEY_TYPE):
+            raise ValueError(f"{self.ALG} signing needs a {self.KEY_TYPE.__name__}")
+        self._ecdsa = ec.ECDSA(hashes.SHA256())
 
-    def _base64url_encode(self, data: bytes) -> str:
-        return base64.urlsafe_b64encode(data).decode('ascii').rstrip('=')
+    @property
+    def algorithm(self) -> str:
+        return self.ALG
+
+    @classmethod
+    def signing_input(cls, envelope: Dict[str, Any], kid: str) -> Tuple[str, bytes]:
+        """Returns the encoded JWS header and the bytes that get signed."""
+        # 1. JWS Header (cached per kid); 2. JCS Canonicalized Envelope
+        header_b64, header = _encoded_header(cls.ALG, kid)
+        # 3. Create Signing Input
+        return header_b64, _jws_signing_input(header, EnvelopeCanonicalizer.dumps(envelope))
+
+    def _signature(self, signing_input: bytes) -> bytes:
+        # 4. Sign via ECDSA P-256 / SHA-256
+        r, s = decode_dss_signature(self.private_key.sign(signing_input, self._ecdsa))
+        # 5. Convert DERSIG (ASN.1) to Raw 64 Bytes (r | s) for JWS
+        return b64url(r.to_bytes(32, 'big') + s.to_bytes(32, 'big'))
+
+    def sign_input(self, signing_input: bytes) -> str:
+        """Signs prepared JWS input and returns the base64url raw signature."""
+        return self._signature(signing_input).decode('ascii')
 
     def sign(self, envelope: Dict[str, Any], kid: str) -> str:
         """
         Generates a detached JWS signature for the envelope.
         """
-        # 1. Prepare JWS Header
-        header = {"alg": "ES256", "kid": kid, "typ": "JOSE"}
-        header_bytes = rfc8785.dumps(header)
-        header_b64 = self._base64url_encode(header_bytes)
-        
-        # 2. Prepare Payload (JCS Canonicalized Envelope)
-        envelope_bytes = rfc8785.dumps(envelope)
-        envelope_b64 = self._base64url_encode(envelope_bytes)
-        
-        # 3. Create Signing Input
-        signing_input = f"{header_b64}.{envelope_b64}".encode('ascii')
-        
-        # 4. Sign via ECDSA P-256 / SHA-256
-        raw_sig = self.private_key.sign(signing_input, ec.ECDSA(hashes.SHA256()))
-        
-        # 5. Convert DERSIG (ASN.1) to Raw 64 Bytes (r | s) for JWS
-        r, s = decode_dss_signature(raw_sig)
-        sig_bytes = r.to_bytes(32, 'big') + s.to_bytes(32, 'big')
-        sig_b64 = self._base64url_encode(sig_bytes)
-        
+        _, header = _encoded_header(self.ALG, kid)
+        signing_input = _jws_signing_input(header, EnvelopeCanonicalizer.dumps(envelope))
+        return b"..".join((header, self._signature(signing_input))).decode('ascii')
+
+    @classmethod
+    def signing_inputs(cls, envelopes: List[Dict[str, Any]], kid: str) -> Tuple[str, List[bytes]]:
+        """signing_input() for a batch."""
+        header_b64, header = _encoded_header(cls.ALG, kid)
+        dumps = EnvelopeCanonicalizer.dumps
+        return header_b64, [_jws_signing_input(header, dumps(envelope)) for envelope in envelopes]
+
+    def sign_inputs(self, signing_inputs: List[bytes]) -> List[str]:
+        signature = self._signature
+        return [signature(signing_input).decode('ascii') for signing_input in signing_inputs]
+
+    def sign_many(self, envelopes: List[Dict[str, Any]], kid: str) -> List[str]:
+        header_b64, signing_inputs = self.signing_inputs(envelopes, kid)
+        return [f"{header_b64}..{sig_b64}" for sig_b64 in self.sign_inputs(signing_inputs)]
+
+class Ed25519RequestSigner(RequestSigner):
+    """
+    EdDSA (Ed25519) variant of RequestSigner, used for merchants that advertise it.
+    Same detached JWS over the same envelope; the signature is already the raw
+    64 bytes, so there is no DER conversion.
+    """
+    ALG = "EdDSA"
+    KEY_TYPE = ed25519.Ed25519PrivateKey
+
+    def _signature(self, signing_input: bytes) -> bytes:
+        return b64url(self.private_key.sign(signing_input))
+
+def load_request_signer(private_key_pem: str) -> RequestSigner:
+    """Builds the signer matching the key type (EC P-256 -> ES256, Ed25519 -> EdDSA)."""
+    key = serialization.load_pem_private_key(private_key_pem.encode('ascii'), password=None)
+    if isinstance(key, ed25519.Ed25519PrivateKey):
+        return Ed25519RequestSigner(private_key_pem)
+    return RequestSigner(private_key_pem)
+
+# Per-process signer, loaded once by the pool initializer
+_worker_signer: Optional[RequestSigner] = None
+
+def _init_worker(private_key_pem: str) -> None:
+    global _worker_signer
+    _worker_signer = load_request_signer(private_key_pem)
+
+def _sign_in_worker(signing_input: bytes) -> str:
+    assert _worker_signer is not None, "signing worker not initialized"
+    return _worker_signer.sign_input(signing_input)
+
+def _sign_batch_in_worker(signing_inputs: List[bytes]) -> List[str]:
+    assert _worker_signer is not None, "signing worker not initialized"
+    return _worker_signer.sign_inputs(signing_inputs)
+
+class ProcessPoolRequestSigner(RequestSignerPort):
+    """
+    Signer that runs the signature operation on a pool of worker processes,
+    each holding its own copy of the key, so signing scales past one core.
+    Canonicalization stays in the caller (only the signing input crosses the
+    process boundary); sign_async awaits the pool without blocking the loop.
+    Workers are spawned, which re-imports the program's main module in each
+    one: keep process-wide setup (e.g. building the Container) under main().
+    """
+    def __init__(self,
+                 private_key_pem: str,
+                 max_workers: Optional[int] = None,
+                 mp_context: Optional[Any] = None):
+        # Fail fast on a bad key instead of inside every worker
+        self._signer_cls = type(load_request_signer(private_key_pem))
+        self.max_workers = max_workers or os.cpu_count() or 1
+        # spawn: the parent runs threads, which fork does not play well with
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=mp_context or multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(private_key_pem,)
+        )
+
+    @property
+    def algorithm(self) -> str:
+        return self._signer_cls.ALG
+
+    def sign(self, envelope: Dict[str, Any], kid: str) -> str:
+        header_b64, signing_input = self._signer_cls.signing_input(envelope, kid)
+        return f"{header_b64}..{self._pool.submit(_sign_in_worker, signing_input).result()}"
+
+    async def sign_async(self, envelope: Dict[str, Any], kid: str) -> str:
+        header_b64, signing_input = self._signer_cls.signing_input(envelope, kid)
+        loop = asyncio.get_running_loop()
+        sig_b64 = await loop.run_in_executor(self._pool, _sign_in_worker, signing_input)
         return f"{header_b64}..{sig_b64}"
+
+    def _chunks(self, signing_inputs: List[bytes]) -> List[List[bytes]]:
+        # One task per worker instead of one per envelope
+        size = -(-len(signing_inputs) // self.max_workers)
+        return [signing_inputs[i:i + size] for i in range(0, len(signing_inputs), size)]
+
+    def sign_many(self, envelopes: List[Dict[str, Any]], kid: str) -> List[str]:
+        header_b64, signing_inputs = self._signer_cls.signing_inputs(envelopes, kid)
+        if not signing_inputs:
+            return []
+        batches = self._pool.map(_sign_batch_in_worker, self._chunks(signing_inputs))
+        return [f"{header_b64}..{sig_b64}" for batch in batches for sig_b64 in batch]
+
+    async def sign_many_async(self, envelopes: List[Dict[str, Any]], kid: str) -> List[str]:
+        header_b64, signing_inputs = self._signer_cls.signing_inputs(envelopes, kid)
+        if not signing_inputs:
+            return []
+        loop = asyncio.get_running_loop()
+        batches = await asyncio.gather(*(
+            loop.run_in_executor(self._pool, _sign_batch_in_worker, chunk)
+            for chunk in self._chunks(signing_inputs)
+        ))
+        return [f"{header_b64}..{sig_b64}" for batch in batches for sig_b64 in batch]
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=True, cancel_futures=True)
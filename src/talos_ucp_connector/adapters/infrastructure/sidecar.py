@@ -0,0 +1,309 @@
+import argparse
+import asyncio
+import base64
+import functools
+import itertools
+import json
+import os
+import queue
+import socket
+import struct
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+from talos_ucp_connector.adapters.infrastructure.security import (
+    RequestSigner,
+    Ed25519RequestSigner,
+    load_request_signer,
+)
+from talos_ucp_connector.ports.spi import RequestSignerPort
+
+# Wire format: 4-byte big-endian length, then a JSON object.
+#   request:  {"id": 7, "items": [[kid, signing_input], ...]}
+#   response: {"id": 7, "signatures": [sig_b64, ...]} or {"id": 7, "error": "..."}
+# Signing inputs are the ASCII JWS "header.payload" strings, so the key never
+# leaves the sidecar and the connector keeps doing the canonicalization.
+_LENGTH = struct.Struct(">I")
+
+_SIGNER_CLASSES = {"ES256": RequestSigner, "EdDSA": Ed25519RequestSigner}
+
+class SidecarSigningError(RuntimeError):
+    pass
+
+def encode_frame(message: Dict[str, Any]) -> bytes:
+    body = json.dumps(message, separators=(",", ":")).encode("utf-8")
+    return _LENGTH.pack(len(body)) + body
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < size:
+        chunk = sock.recv(size - len(buf))
+        if not chunk:
+            raise ConnectionError("signing sidecar closed the connection")
+        buf += chunk
+    return bytes(buf)
+
+def read_frame(sock: socket.socket) -> Dict[str, Any]:
+    (size,) = _LENGTH.unpack(_recv_exact(sock, _LENGTH.size))
+    return json.loads(_recv_exact(sock, size))
+
+def _settle(future: "Future[str]", result: Optional[str] = None, error: Optional[BaseException] = None) -> None:
+    # The caller may have given up (timeout / cancellation) in the meantime
+    try:
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)  # type: ignore[arg-type]
+    except InvalidStateError:
+        pass
+
+@dataclass
+class _Pending:
+    kid: str
+    signing_input: str
+    future: "Future[str]"
+
+class SidecarRequestSigner(RequestSignerPort):
+    """
+    Signs through a local signing sidecar over a Unix domain socket, so private
+    keys stay out of the connector process.
+    Requests arriving within `batch_window` seconds (up to `max_batch`) share
+    one frame, and frames are pipelined on a single connection without waiting
+    for earlier responses. `algorithm` must match the sidecar's key for `kid`.
+    """
+    def __init__(self,
+                 socket_path: str,
+                 algorithm: str = "ES256",
+                 max_batch: int = 64,
+                 batch_window: float = 0.001,
+                 timeout: float = 5.0):
+        if algorithm not in _SIGNER_CLASSES:
+            raise ValueError(f"Unsupported algorithm: {algorithm}")
+        self.socket_path = socket_path
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self.timeout = timeout
+        self._signer_cls = _SIGNER_CLASSES[algorithm]
+
+        self._queue: "queue.Queue[Optional[_Pending]]" = queue.Queue()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._sock: Optional[socket.socket] = None
+        self._inflight: Dict[int, List["Future[str]"]] = {}
+        self._writer = threading.Thread(target=self._write_loop, name="ucp-signer-writer", daemon=True)
+        self._writer.start()
+
+    @property
+    def algorithm(self) -> str:
+        return self._signer_cls.ALG
+
+    # --- connection ---
+
+    def _connection(self) -> socket.socket:
+        with self._lock:
+            if self._sock is None:
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                sock.connect(self.socket_path)
+                self._sock = sock
+                threading.Thread(target=self._read_loop, args=(sock,), name="ucp-signer-reader", daemon=True).start()
+            return self._sock
+
+    def _drop_connection(self, sock: socket.socket, error: BaseException) -> None:
+        with self._lock:
+            if self._sock is sock:
+                self._sock = None
+                inflight, self._inflight = self._inflight, {}
+            else:
+                # Already dropped (e.g. by the writer, which may have
+                # reconnected): whatever is in flight belongs to the new connection
+                inflight = {}
+        sock.close()
+        for futures in inflight.values():
+            for future in futures:
+                _settle(future, error=SidecarSigningError(f"signing sidecar unavailable: {error}"))
+
+    def _read_loop(self, sock: socket.socket) -> None:
+        try:
+            while True:
+                self._dispatch(read_frame(sock))
+        except Exception as e:
+            # Including malformed frames: a reader that dies while the
+            # connection stays registered would leave every later sign() hanging
+            self._drop_connection(sock, e)
+
+    def _dispatch(self, response: Any) -> None:
+        frame_id = response.get("id") if isinstance(response, dict) else None
+        with self._lock:
+            futures = self._inflight.pop(frame_id, None) if isinstance(frame_id, int) else None
+        if futures is None:
+            raise SidecarSigningError(f"response for unknown frame {frame_id!r}")
+        if "error" in response:
+            for future in futures:
+                _settle(future, error=SidecarSigningError(str(response["error"])))
+            return
+
+        signatures = response.get("signatures")
+        if not isinstance(signatures, list) or len(signatures) != len(futures):
+            error = SidecarSigningError(f"malformed response for frame {frame_id}")
+            for future in futures:
+                _settle(future, error=error)
+            raise error
+        for future, sig_b64 in zip(futures, signatures):
+            _settle(future, result=sig_b64)
+
+    # --- batching ---
+
+    def _next_batch(self, first: _Pending) -> Tuple[List[_Pending], bool]:
+        batch = [first]
+        deadline = time.monotonic() + self.batch_window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _write_loop(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch, stop = self._next_batch(first)
+            self._send(batch)
+            if stop:
+                return
+
+    def _send(self, batch: List[_Pending]) -> None:
+        frame_id = next(self._ids)
+        frame = encode_frame({"id": frame_id, "items": [[p.kid, p.signing_input] for p in batch]})
+        try:
+            sock = self._connection()
+        except OSError as e:
+            for pending in batch:
+                _settle(pending.future, error=SidecarSigningError(f"signing sidecar unavailable: {e}"))
+            return
+        with self._lock:
+            registered = self._sock is sock
+            if registered:
+                self._inflight[frame_id] = [p.future for p in batch]
+        if not registered:
+            # The reader dropped the connection in between; the next batch reconnects
+            for pending in batch:
+                _settle(pending.future, error=SidecarSigningError("signing sidecar connection lost"))
+            return
+        try:
+            sock.sendall(frame)
+        except OSError as e:
+            self._drop_connection(sock, e)
+
+    def _submit(self, kid: str, signing_input: bytes) -> "Future[str]":
+        future: "Future[str]" = Future()
+        self._queue.put(_Pending(kid, signing_input.decode("ascii"), future))
+        return future
+
+    # --- RequestSignerPort ---
+
+    def sign(self, envelope: Dict[str, Any], kid: str) -> str:
+        header_b64, signing_input = self._signer_cls.signing_input(envelope, kid)
+        return f"{header_b64}..{self._submit(kid, signing_input).result(self.timeout)}"
+
+    async def sign_async(self, envelope: Dict[str, Any], kid: str) -> str:
+        header_b64, signing_input = self._signer_cls.signing_input(envelope, kid)
+        sig_b64 = await asyncio.wait_for(asyncio.wrap_future(self._submit(kid, signing_input)), self.timeout)
+        return f"{header_b64}..{sig_b64}"
+
+    def sign_many(self, envelopes: List[Dict[str, Any]], kid: str) -> List[str]:
+        header_b64, signing_inputs = self._signer_cls.signing_inputs(envelopes, kid)
+        futures = [self._submit(kid, signing_input) for signing_input in signing_inputs]
+        return [f"{header_b64}..{future.result(self.timeout)}" for future in futures]
+
+    async def sign_many_async(self, envelopes: List[Dict[str, Any]], kid: str) -> List[str]:
+        header_b64, signing_inputs = self._signer_cls.signing_inputs(envelopes, kid)
+        futures = [asyncio.wrap_future(self._submit(kid, signing_input)) for signing_input in signing_inputs]
+        sigs = await asyncio.wait_for(asyncio.gather(*futures), self.timeout)
+        return [f"{header_b64}..{sig_b64}" for sig_b64 in sigs]
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._writer.join(self.timeout)
+        with self._lock:
+            sock = self._sock
+        if sock is not None:
+            self._drop_connection(sock, ConnectionError("signer closed"))
+
+@functools.lru_cache(maxsize=256)
+def _header_alg(header_b64: str) -> Optional[str]:
+    # Headers repeat per kid, so each distinct one is decoded once
+    header = json.loads(base64.urlsafe_b64decode(header_b64 + "=" * (-len(header_b64) % 4)))
+    return header.get("alg") if isinstance(header, dict) else None
+
+class SigningSidecar:
+    """
+    Reference signing sidecar: holds the keys (kid -> signer) and serves the
+    frame protocol above on a Unix socket. Intended for local load testing;
+    a production sidecar would front an HSM or KMS with the same protocol.
+    """
+    def __init__(self, signers: Dict[str, RequestSigner]):
+        self.signers = signers
+
+    def sign_frame(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        signatures = []
+        try:
+            for kid, signing_input in request["items"]:
+                signer = self.signers[kid]
+                # A header the key can't produce would yield a signature nobody can verify
+                alg = _header_alg(signing_input.split(".", 1)[0])
+                if alg != signer.ALG:
+                    error = f"alg {alg!r} does not match the {signer.ALG} key for kid {kid!r}"
+                    return {"id": request.get("id"), "error": error}
+                signatures.append(signer.sign_input(signing_input.encode("ascii")))
+        except KeyError as e:
+            return {"id": request.get("id"), "error": f"unknown kid {e}"}
+        except ValueError as e:
+            return {"id": request.get("id"), "error": f"malformed signing input: {e}"}
+        return {"id": request["id"], "signatures": signatures}
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                (size,) = _LENGTH.unpack(await reader.readexactly(_LENGTH.size))
+                request = json.loads(await reader.readexactly(size))
+                writer.write(encode_frame(self.sign_frame(request)))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, socket_path: str, ready: Optional[threading.Event] = None) -> None:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        server = await asyncio.start_unix_server(self._handle, path=socket_path)
+        os.chmod(socket_path, 0o600)
+        if ready is not None:
+            ready.set()
+        async with server:
+            await server.serve_forever()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Reference UCP request signing sidecar")
+    parser.add_argument("--socket", default=os.getenv("UCP_SIGNER_SOCKET", "/tmp/talos-ucp-signer.sock"))
+    parser.add_argument("--key", action="append", required=True, metavar="KID=PEM_PATH",
+                        help="Signing key for a kid (repeatable); EC P-256 or Ed25519 PEM")
+    args = parser.parse_args()
+
+    signers = {}
+    for spec in args.key:
+        kid, path = spec.split("=", 1)
+        with open(path, "r", encoding="ascii") as f:
+            signers[kid] = load_request_signer(f.read())
+    asyncio.run(SigningSidecar(signers).serve(args.socket))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+import base64
+import functools
+import json
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+from cryptography.hazmat.primitives.asymmetric.utils import encode_dss_signature
+from talos_ucp_connector.domain.helpers import EnvelopeCanonicalizer
+from talos_ucp_connector.ports.spi import DiscoveryPort, SignatureVerifierPort
+
+logger = logging.getLogger(__name__)
+
+PublicKey = Union[ec.EllipticCurvePublicKey, ed25519.Ed25519PublicKey]
+
+# JWS alg -> key type it must be verified with
+_ALG_KEY_TYPES = {
+    "ES256": ec.EllipticCurvePublicKey,
+    "EdDSA": ed25519.Ed25519PublicKey,
+}
+
+def _b64url_decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+def _b64url_encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode('ascii').rstrip('=')
+
+def public_key_from_jwk(jwk: Dict[str, Any]) -> PublicKey:
+    """Parses a P-256 (EC) or Ed25519 (OKP) public JWK."""
+    kty, crv = jwk.get("kty"), jwk.get("crv")
+    if kty == "EC" and crv == "P-256":
+        return ec.EllipticCurvePublicNumbers(
+            int.from_bytes(_b64url_decode(jwk["x"]), "big"),
+            int.from_bytes(_b64url_decode(jwk["y"]), "big"),
+            ec.SECP256R1()
+        ).public_key()
+    if kty == "OKP" and crv == "Ed25519":
+        return ed25519.Ed25519PublicKey.from_public_bytes(_b64url_decode(jwk["x"]))
+    raise ValueError(f"Unsupported JWK: kty={kty} crv={crv}")
+
+@functools.lru_cache(maxsize=1024)
+def _parse_header(header_b64: str) -> Tuple[str, str]:
+    # Headers repeat per signing key, so each distinct one is decoded once
+    header = json.loads(_b64url_decode(header_b64))
+    return header["alg"], header["kid"]
+
+class MerchantKeyCache:
+    """
+    Parsed merchant public keys by (merchant domain, kid).
+    A merchant's key set comes from the `signing_keys` JWKS in its UCP profile
+    and is kept for `ttl` seconds. An unknown kid triggers an early refetch
+    (key rotation), at most once per `min_refresh_interval`; that refetch
+    revalidates with the merchant rather than trusting a cached profile.
+    """
+    def __init__(self,
+                 discovery: DiscoveryPort,
+                 ttl: float = 300.0,
+                 min_refresh_interval: float = 30.0,
+                 timer: Callable[[], float] = time.monotonic):
+        self.discovery = discovery
+        self.ttl = ttl
+        self.min_refresh_interval = min_refresh_interval
+        self.timer = timer
+        self._keys: Dict[str, Dict[str, PublicKey]] = {}
+        self._fetched_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _fetch(self, merchant_domain: str, revalidate: bool) -> Dict[str, PublicKey]:
+        profile = self.discovery.discover(merchant_domain, revalidate=revalidate).profile
+        jwks = profile.get("signing_keys") or []
+        if isinstance(jwks, dict):
+            jwks = jwks.get("keys", [])
+        keys = {}
+        for jwk in jwks:
+            try:
+                keys[jwk["kid"]] = public_key_from_jwk(jwk)
+            except (KeyError, ValueError) as e:
+                logger.warning("Skipping unusable signing key from %s: %s", merchant_domain, e)
+        return keys
+
+    def get(self, merchant_domain: str, kid: str) -> Optional[PublicKey]:
+        now = self.timer()
+        with self._lock:
+            keys = self._keys.get(merchant_domain)
+            fetched_at = self._fetched_at.get(merchant_domain)
+        if keys is not None and fetched_at is not None:
+            age = now - fetched_at
+            if age < self.ttl and (kid in keys or age < self.min_refresh_interval):
+                return keys.get(kid)
+
+        # A kid missing from the keys we hold means the profile we have is stale
+        keys = self._fetch(merchant_domain, revalidate=keys is not None and kid not in keys)
+        with self._lock:
+            self._keys[merchant_domain] = keys
+            self._fetched_at[merchant_domain] = now
+        return keys.get(kid)
+
+    def invalidate(self, merchant_domain: str) -> None:
+        with self._lock:
+            self._keys.pop(merchant_domain, None)
+            self._fetched_at.pop(merchant_domain, None)
+
+class SignatureVerifier(SignatureVerifierPort):
+    """
+    Verifies detached JWS signatures (ES256 / EdDSA) on merchant responses and
+    webhooks against the merchant's published keys. Keys and JWS headers are
+    parsed once and cached, so a warm verification is canonicalization plus
+    the signature check.
+    """
+    def __init__(self, keys: MerchantKeyCache):
+        self.keys = keys
+
+    def _verify_input(self, merchant_domain: str, signature: str, payload: bytes) -> bool:
+        try:
+            header_b64, detached, sig_b64 = signature.split(".")
+            if detached:
+                return False
+            alg, kid = _parse_header(header_b64)
+            key_type = _ALG_KEY_TYPES.get(alg)
+            if key_type is None:
+                return False
+            public_key = self.keys.get(merchant_domain, kid)
+            if not isinstance(public_key, key_type):
+                return False
+
+            signing_input = f"{header_b64}.{_b64url_encode(payload)}".encode('ascii')
+            raw_sig = _b64url_decode(sig_b64)
+            if alg == "ES256":
+                if len(raw_sig) != 64:
+                    return False
+                der = encode_dss_signature(int.from_bytes(raw_sig[:32], "big"), int.from_bytes(raw_sig[32:], "big"))
+                public_key.verify(der, signing_input, ec.ECDSA(hashes.SHA256()))
+            else:
+                public_key.verify(raw_sig, signing_input)
+            return True
+        except InvalidSignature:
+            return False
+        except (ValueError, KeyError, TypeError) as e:
+            logger.debug("Malformed signature from %s: %s", merchant_domain, e)
+            return False
+
+    def verify(self, merchant_domain: str, signature: str, envelope: Dict[str, Any]) -> bool:
+        return self._verify_input(merchant_domain, signature, EnvelopeCanonicalizer.dumps(envelope))
+
+    def verify_bytes(self, merchant_domain: str, signature: str, payload: bytes) -> bool:
+        """Verifies a signature over raw payload bytes, e.g. a webhook body as received."""
+        return self._verify_input(merchant_domain, signature, payload)
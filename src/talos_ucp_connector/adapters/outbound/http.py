@@ -1,62 +1,377 @@
 import httpx
 import uuid
 import ssl
-from typing import Dict, Any, List, Optional
-from talos_ucp_connector.ports.spi import DiscoveryPort, MerchantCheckoutPort, RequestSignerPort
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+from typing import Dict, Any, Callable, Generic, List, Optional, Tuple, TypeVar
+from cachetools import LRUCache
+from talos_ucp_connector.ports.spi import (
+    DiscoveredProfile,
+    DiscoveryPort,
+    MerchantCheckoutPort,
+    AsyncDiscoveryPort,
+    AsyncMerchantCheckoutPort,
+)
 
-class HttpDiscoveryAdapter(DiscoveryPort):
-    def __init__(self, client: Optional[httpx.Client] = None):
+C = TypeVar("C", httpx.Client, httpx.AsyncClient)
+
+class HostClientPool(Generic[C]):
+    """
+    Lazily builds one httpx client per merchant host.
+    Each host gets its own connection limits, so a slow merchant can only
+    exhaust its own pool and never blocks requests to other merchants.
+    """
+    def __init__(self,
+                 build: Callable[[httpx.Limits], C],
+                 max_connections: int = 20,
+                 max_keepalive: int = 10,
+                 host_limits: Optional[Dict[str, Dict[str, int]]] = None):
+        self._build = build
+        self.max_connections = max_connections
+        self.max_keepalive = max_keepalive
+        self.host_limits = host_limits or {}
+        self._clients: Dict[str, C] = {}
+        self._lock = threading.Lock()
+
+    def limits_for(self, host: str) -> httpx.Limits:
+        overrides = self.host_limits.get(host, {})
+        return httpx.Limits(
+            max_connections=overrides.get("max_connections", self.max_connections),
+            max_keepalive_connections=overrides.get("max_keepalive", self.max_keepalive),
+        )
+
+    def get(self, url: str) -> C:
+        host = urlsplit(url).netloc.lower()
+        client = self._clients.get(host)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(host)
+                if client is None:
+                    client = self._build(self.limits_for(host))
+                    self._clients[host] = client
+        return client
+
+    def drain(self) -> List[C]:
+        """Detaches every pooled client so the caller can close them."""
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+        return clients
+
+class HttpClientFactory:
+    """
+    Single source of merchant HTTP clients for discovery and checkout.
+    Owns one TLS 1.3 context and one per-host pool per I/O flavour, so the
+    connection opened by discovery is the one the first checkout reuses.
+    """
+    def __init__(self,
+                 http2: bool = True,
+                 max_connections: int = 20,
+                 max_keepalive: int = 10,
+                 host_limits: Optional[Dict[str, Dict[str, int]]] = None,
+                 timeout: httpx.Timeout = httpx.Timeout(30.0, connect=10.0)):
         # Enforce TLS 1.3
-        context = ssl.create_default_context()
-        context.minimum_version = ssl.TLSVersion.TLSv1_3
-        self.client = client or httpx.Client(timeout=10.0, verify=context)
+        self.ssl_context = ssl.create_default_context()
+        self.ssl_context.minimum_version = ssl.TLSVersion.TLSv1_3
+        pool_limits = {
+            "max_connections": max_connections,
+            "max_keepalive": max_keepalive,
+            "host_limits": host_limits,
+        }
+        self.sync_pools: HostClientPool[httpx.Client] = HostClientPool(
+            lambda limits: httpx.Client(timeout=timeout, verify=self.ssl_context, http2=http2, limits=limits),
+            **pool_limits,
+        )
+        self.async_pools: HostClientPool[httpx.AsyncClient] = HostClientPool(
+            lambda limits: httpx.AsyncClient(timeout=timeout, verify=self.ssl_context, http2=http2, limits=limits),
+            **pool_limits,
+        )
+
+    def client_for(self, url: str) -> httpx.Client:
+        return self.sync_pools.get(url)
+
+    def async_client_for(self, url: str) -> httpx.AsyncClient:
+        return self.async_pools.get(url)
+
+    def close(self) -> None:
+        for client in self.sync_pools.drain():
+            client.close()
+
+    async def aclose(self) -> None:
+        for client in self.async_pools.drain():
+            await client.aclose()
+
+# Response headers the cache keeps: freshness inputs and validators
+_CACHE_HEADERS = ("cache-control", "expires", "date", "age", "etag", "last-modified")
+
+@dataclass
+class _CachedProfile:
+    profile: Dict[str, Any]
+    headers: httpx.Headers
+    expires_at: float
+
+class ProfileHttpCache:
+    """
+    Private HTTP cache for /.well-known/ucp responses (RFC 9111 subset).
+    Honours Cache-Control max-age/no-cache/no-store and Age, and keeps the
+    ETag/Last-Modified validators so stale profiles are revalidated with a
+    conditional GET that a 304 can answer without a body.
+    """
+    def __init__(self, maxsize: int = 1024, timer: Callable[[], float] = time.monotonic):
+        self.timer = timer
+        self._entries: LRUCache = LRUCache(maxsize=maxsize)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _freshness_lifetime(headers: httpx.Headers) -> Optional[float]:
+        """Seconds the response stays fresh, or None when it must not be stored."""
+        directives: Dict[str, Optional[str]] = {}
+        for part in headers.get("cache-control", "").split(","):
+            name, _, value = part.strip().partition("=")
+            if name:
+                directives[name.lower()] = value.strip('"') or None
+        if "no-store" in directives:
+            return None
+        if "no-cache" in directives:
+            return 0.0
+
+        lifetime = 0.0
+        max_age = directives.get("max-age")
+        if max_age is not None and max_age.isdigit():
+            lifetime = float(max_age)
+        elif headers.get("expires") and headers.get("date"):
+            try:
+                expires = parsedate_to_datetime(headers["expires"])
+                date = parsedate_to_datetime(headers["date"])
+                lifetime = max(0.0, (expires - date).total_seconds())
+            except (TypeError, ValueError):
+                lifetime = 0.0
+
+        age = headers.get("age", "")
+        if age.isdigit():
+            lifetime -= float(age)
+        return max(0.0, lifetime)
+
+    @staticmethod
+    def _stored_headers(headers: httpx.Headers) -> httpx.Headers:
+        return httpx.Headers({name: headers[name] for name in _CACHE_HEADERS if name in headers})
+
+    @staticmethod
+    def _updated_headers(stored: httpx.Headers, not_modified: httpx.Headers) -> httpx.Headers:
+        """Stored headers updated with those a 304 carries (RFC 9111 4.3.4)."""
+        merged = httpx.Headers(stored)
+        # The stored Age described the original response, not this one
+        merged.pop("age", None)
+        for name in _CACHE_HEADERS:
+            if name in not_modified:
+                merged[name] = not_modified[name]
+        return merged
+
+    @staticmethod
+    def _discovered(profile: Dict[str, Any], headers: httpx.Headers, lifetime: Optional[float]) -> DiscoveredProfile:
+        if lifetime is None:
+            return DiscoveredProfile(profile, cacheable=False)
+        cache_control = headers.get("cache-control", "").lower()
+        if "max-age" in cache_control or "no-cache" in cache_control or "expires" in headers:
+            return DiscoveredProfile(profile, ttl=lifetime)
+        # No freshness information: leave it to the caller's default
+        return DiscoveredProfile(profile)
+
+    def lookup(self, url: str, revalidate: bool = False) -> Tuple[Optional[DiscoveredProfile], Dict[str, str]]:
+        """
+        Returns (fresh profile, {}) on a hit, else (None, conditional request headers).
+        `revalidate` treats a fresh entry as stale, like a request with no-cache.
+        """
+        with self._lock:
+            cached = self._entries.get(url)
+        if cached is None:
+            return None, {}
+        remaining = cached.expires_at - self.timer()
+        if remaining > 0 and not revalidate:
+            return DiscoveredProfile(cached.profile, ttl=remaining), {}
+
+        validators = {}
+        if "etag" in cached.headers:
+            validators["If-None-Match"] = cached.headers["etag"]
+        if "last-modified" in cached.headers:
+            validators["If-Modified-Since"] = cached.headers["last-modified"]
+        return None, validators
+
+    def resolve(self, url: str, resp: httpx.Response) -> DiscoveredProfile:
+        """Turns a (possibly 304) response into a profile and updates the cache."""
+        with self._lock:
+            cached = self._entries.get(url)
+
+        if cached is not None and resp.status_code == 304:
+            # A bare 304 keeps the stored Cache-Control/Expires
+            headers = self._updated_headers(cached.headers, resp.headers)
+            lifetime = self._freshness_lifetime(headers)
+            with self._lock:
+                if lifetime is None:
+                    self._entries.pop(url, None)
+                else:
+                    self._entries[url] = _CachedProfile(
+                        profile=cached.profile,
+                        headers=headers,
+                        expires_at=self.timer() + lifetime,
+                    )
+            return self._discovered(cached.profile, headers, lifetime)
 
-    def fetch_profile(self, merchant_domain: str) -> Dict[str, Any]:
-        url = f"https://{merchant_domain}/.well-known/ucp"
-        resp = self.client.get(url)
         resp.raise_for_status()
-        return resp.json()
+        profile = resp.json()
+        lifetime = self._freshness_lifetime(resp.headers)
+        with self._lock:
+            if lifetime is None:
+                self._entries.pop(url, None)
+            else:
+                self._entries[url] = _CachedProfile(
+                    profile=profile,
+                    headers=self._stored_headers(resp.headers),
+                    expires_at=self.timer() + lifetime,
+                )
+        return self._discovered(profile, resp.headers, lifetime)
+
+def _profile_url(merchant_domain: str) -> str:
+    return f"https://{merchant_domain}/.well-known/ucp"
+
+def _with_request_id(headers: Dict[str, str]) -> Dict[str, str]:
+    req_headers = headers.copy()
+    req_headers["Request-Id"] = str(uuid.uuid4())
+    # UCP-Agent is usually added by the service/domain layer calling this
+    return req_headers
+
+def _body(payload: Dict[str, Any], content: Optional[bytes]) -> Dict[str, Any]:
+    # Send the signed bytes verbatim when the caller has them
+    return {"content": content} if content is not None else {"json": payload}
+
+def _order_items(data: Any) -> List[Dict[str, Any]]:
+    # SPEC: UCP List endpoints return a dictionary with "items" key or a direct list
+    return data.get("items", []) if isinstance(data, dict) else data
+
+class HttpDiscoveryAdapter(DiscoveryPort):
+    def __init__(self,
+                 client: Optional[httpx.Client] = None,
+                 client_factory: Optional[HttpClientFactory] = None,
+                 http_cache: Optional[ProfileHttpCache] = None):
+        self.client = client
+        self.client_factory = client_factory or HttpClientFactory()
+        self.http_cache = http_cache if http_cache is not None else ProfileHttpCache()
+
+    def fetch_profile(self, merchant_domain: str) -> Dict[str, Any]:
+        return self.discover(merchant_domain).profile
+
+    def discover(self, merchant_domain: str, revalidate: bool = False) -> DiscoveredProfile:
+        url = _profile_url(merchant_domain)
+        hit, validators = self.http_cache.lookup(url, revalidate)
+        if hit is not None:
+            return hit
+
+        client = self.client if self.client is not None else self.client_factory.client_for(url)
+        resp = client.get(url, headers=validators) if validators else client.get(url)
+        return self.http_cache.resolve(url, resp)
 
 class HttpMerchantCheckoutAdapter(MerchantCheckoutPort):
-    def __init__(self, client: Optional[httpx.Client] = None):
-        context = ssl.create_default_context()
-        context.minimum_version = ssl.TLSVersion.TLSv1_3
-        self.client = client or httpx.Client(timeout=30.0, verify=context)
+    """
+    Merchant REST client over HTTP/2 with an isolated connection pool per host.
+    An injected client bypasses the per-host pools and serves every host.
+    """
+    def __init__(self, client: Optional[httpx.Client] = None, client_factory: Optional[HttpClientFactory] = None):
+        self.client = client
+        self.client_factory = client_factory or HttpClientFactory()
+
+    def _client_for(self, url: str) -> httpx.Client:
+        return self.client if self.client is not None else self.client_factory.client_for(url)
 
     def _prepare_headers(self, headers: Dict[str, str]) -> Dict[str, str]:
-        req_headers = headers.copy()
-        req_headers["Request-Id"] = str(uuid.uuid4())
-        # UCP-Agent is usually added by the service/domain layer calling this
-        return req_headers
+        return _with_request_id(headers)
 
-    def post_checkout(self, url: str, payload: Dict[str, Any], headers: Dict[str, str]) -> Dict[str, Any]:
+    def post_checkout(self, url: str, payload: Dict[str, Any], headers: Dict[str, str], content: Optional[bytes] = None) -> Dict[str, Any]:
         req_headers = self._prepare_headers(headers)
-        resp = self.client.post(url, json=payload, headers=req_headers)
+        resp = self._client_for(url).post(url, **_body(payload, content), headers=req_headers)
         resp.raise_for_status()
         return resp.json()
 
-    def put_checkout(self, url: str, payload: Dict[str, Any], headers: Dict[str, str]) -> Dict[str, Any]:
+    def put_checkout(self, url: str, payload: Dict[str, Any], headers: Dict[str, str], content: Optional[bytes] = None) -> Dict[str, Any]:
         req_headers = self._prepare_headers(headers)
-        resp = self.client.put(url, json=payload, headers=req_headers)
+        resp = self._client_for(url).put(url, **_body(payload, content), headers=req_headers)
         resp.raise_for_status()
         return resp.json()
 
     def get_checkout(self, url: str, headers: Dict[str, str]) -> Dict[str, Any]:
         req_headers = self._prepare_headers(headers)
-        resp = self.client.get(url, headers=req_headers)
+        resp = self._client_for(url).get(url, headers=req_headers)
         resp.raise_for_status()
         return resp.json()
 
     def get_order(self, url: str, headers: Dict[str, str]) -> Dict[str, Any]:
         req_headers = self._prepare_headers(headers)
-        resp = self.client.get(url, headers=req_headers)
+        resp = self._client_for(url).get(url, headers=req_headers)
         resp.raise_for_status()
         return resp.json()
 
     def list_orders(self, url: str, headers: Dict[str, str]) -> List[Dict[str, Any]]:
         req_headers = self._prepare_headers(headers)
-        resp = self.client.get(url, headers=req_headers)
+        resp = self._client_for(url).get(url, headers=req_headers)
+        resp.raise_for_status()
+        return _order_items(resp.json())
+
+class AsyncHttpDiscoveryAdapter(AsyncDiscoveryPort):
+    def __init__(self,
+                 client: Optional[httpx.AsyncClient] = None,
+                 client_factory: Optional[HttpClientFactory] = None,
+                 http_cache: Optional[ProfileHttpCache] = None):
+        self.client = client
+        self.client_factory = client_factory or HttpClientFactory()
+        self.http_cache = http_cache if http_cache is not None else ProfileHttpCache()
+
+    async def fetch_profile(self, merchant_domain: str) -> Dict[str, Any]:
+        return (await self.discover(merchant_domain)).profile
+
+    async def discover(self, merchant_domain: str, revalidate: bool = False) -> DiscoveredProfile:
+        url = _profile_url(merchant_domain)
+        hit, validators = self.http_cache.lookup(url, revalidate)
+        if hit is not None:
+            return hit
+
+        client = self.client if self.client is not None else self.client_factory.async_client_for(url)
+        resp = await (client.get(url, headers=validators) if validators else client.get(url))
+        return self.http_cache.resolve(url, resp)
+
+class AsyncHttpMerchantCheckoutAdapter(AsyncMerchantCheckoutPort):
+    """
+    asyncio counterpart of HttpMerchantCheckoutAdapter (HTTP/2, per-host pools).
+    """
+    def __init__(self, client: Optional[httpx.AsyncClient] = None, client_factory: Optional[HttpClientFactory] = None):
+        self.client = client
+        self.client_factory = client_factory or HttpClientFactory()
+
+    def _client_for(self, url: str) -> httpx.AsyncClient:
+        return self.client if self.client is not None else self.client_factory.async_client_for(url)
+
+    async def post_checkout(self, url: str, payload: Dict[str, Any], headers: Dict[str, str], content: Optional[bytes] = None) -> Dict[str, Any]:
+        resp = await self._client_for(url).post(url, **_body(payload, content), headers=_with_request_id(headers))
+        resp.raise_for_status()
+        return resp.json()
+
+    async def put_checkout(self, url: str, payload: Dict[str, Any], headers: Dict[str, str], content: Optional[bytes] = None) -> Dict[str, Any]:
+        resp = await self._client_for(url).put(url, **_body(payload, content), headers=_with_request_id(headers))
+        resp.raise_for_status()
+        return resp.json()
+
+    async def get_checkout(self, url: str, headers: Dict[str, str]) -> Dict[str, Any]:
+        resp = await self._client_for(url).get(url, headers=_with_request_id(headers))
+        resp.raise_for_status()
+        return resp.json()
+
+    async def get_order(self, url: str, headers: Dict[str, str]) -> Dict[str, Any]:
+        resp = await self._client_for(url).get(url, headers=_with_request_id(headers))
+        resp.raise_for_status()
+        return resp.json()
+
+    async def list_orders(self, url: str, headers: Dict[str, str]) -> List[Dict[str, Any]]:
+        resp = await self._client_for(url).get(url, headers=_with_request_id(headers))
         resp.raise_for_status()
-        # SPEC: UCP List endpoints return a dictionary with "items" key or a direct list
-        data = resp.json()
-        return data.get("items", []) if isinstance(data, dict) else data
+        return _order_items(resp.json())
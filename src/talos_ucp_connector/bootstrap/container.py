@@ -1,10 +1,36 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from typing import Dict, Any
-from talos_ucp_connector.adapters.outbound.http import HttpDiscoveryAdapter, HttpMerchantCheckoutAdapter
+from urllib.parse import urlsplit
+import httpx
+from talos_ucp_connector.adapters.outbound.http import (
+    HttpClientFactory,
+    ProfileHttpCache,
+    HttpDiscoveryAdapter,
+    HttpMerchantCheckoutAdapter,
+    AsyncHttpDiscoveryAdapter,
+    AsyncHttpMerchantCheckoutAdapter,
+)
+from talos_ucp_connector.adapters.inbound.executor import ServiceExecutor
 from talos_ucp_connector.adapters.outbound.payment import SandboxPaymentAdapter
-from talos_ucp_connector.adapters.infrastructure.security import RequestSigner
-from talos_ucp_connector.adapters.infrastructure.state import SystemClock, InMemoryReplayStore
-from talos_ucp_connector.adapters.infrastructure.persistence import ConfigStoreAdapter, AuditAdapter
-from talos_ucp_connector.domain.services import CommerceService
+from talos_ucp_connector.adapters.infrastructure.security import (
+    ProcessPoolRequestSigner,
+    load_request_signer,
+)
+from talos_ucp_connector.adapters.infrastructure.sidecar import SidecarRequestSigner
+from talos_ucp_connector.ports.spi import RequestSignerPort
+from talos_ucp_connector.adapters.infrastructure.verification import MerchantKeyCache, SignatureVerifier
+from talos_ucp_connector.adapters.infrastructure.state import (
+    SystemClock,
+    ShardedReplayStore,
+    BloomReplayFilter,
+    SqliteReplayStore,
+    SharedMemoryReplayStore,
+)
+from talos_ucp_connector.adapters.infrastructure.persistence import ConfigStoreAdapter, AuditAdapter, FileDiscoveryCacheStore
+from talos_ucp_connector.domain.cache import DiscoveryCache
+from talos_ucp_connector.domain.services import CommerceService, AsyncCommerceService, SIGNING_PREFERENCE
 
 class Container:
     """
@@ -16,7 +42,46 @@ class Container:
         
         # 1. Infrastructure / Common
         self.clock = SystemClock()
-        self.replay_store = InMemoryReplayStore()
+        # Shared by every service thread, so striped for concurrent check-and-set
+        replay_config = config.get("replay", {})
+        bloom_config = replay_config.get("bloom")
+        if bloom_config and (replay_config.get("sqlite_path") or replay_config.get("shared_memory")):
+            # The filter is per process and starts empty, so a nonce another
+            # worker (or a previous run) stored would pass as definitely new
+            raise ValueError("replay.bloom cannot be combined with replay.sqlite_path or replay.shared_memory")
+        if replay_config.get("sqlite_path"):
+            # Persistent, so a restart doesn't reopen the replay window
+            self.replay_store = SqliteReplayStore(
+                replay_config["sqlite_path"],
+                ttl_seconds=replay_config.get("ttl_seconds", 600),
+                synchronous=replay_config.get("sqlite_synchronous", "NORMAL")
+            )
+        elif replay_config.get("shared_memory"):
+            # One replay window for every connector process on the host
+            shm_config = replay_config["shared_memory"]
+            self.replay_store = SharedMemoryReplayStore(
+                name=shm_config.get("name", "talos-ucp-replay"),
+                ttl_seconds=replay_config.get("ttl_seconds", 600),
+                capacity=shm_config.get("capacity", 1_000_000),
+                lock_path=shm_config.get("lock_path")
+            )
+        elif bloom_config:
+            # Bounded memory; the exact store behind it is opt-in (it keeps that memory)
+            exact = ShardedReplayStore(
+                ttl_seconds=replay_config.get("ttl_seconds", 600),
+                shards=replay_config.get("shards", 64)
+            ) if bloom_config.get("exact", False) else None
+            self.replay_store = BloomReplayFilter(
+                ttl_seconds=replay_config.get("ttl_seconds", 600),
+                capacity=bloom_config.get("capacity", 1_000_000),
+                false_positive_rate=bloom_config.get("false_positive_rate", 1e-6),
+                exact=exact
+            )
+        else:
+            self.replay_store = ShardedReplayStore(
+                ttl_seconds=replay_config.get("ttl_seconds", 600),
+                shards=replay_config.get("shards", 64)
+            )
         self.audit = AuditAdapter()
         self.config_store = ConfigStoreAdapter(config)
         
@@ -28,15 +93,93 @@ MHcCAQEEIKdHtBu5u+k1s3nea01zCZAPqm932PGK8rG3AbHjFtD7oAoGCCqGSM49
 AwEHoUQDQgAE9FsHcO9ApZ7CIg0ae0v8eCpTJn9yFLlWo/ckdc2DWJpqG6+Ab3IN
 73lHwsaq2p1/RD6o9eICHlVFVU/DZ+5KzQ==
 -----END EC PRIVATE KEY-----""")
-        self.signer = RequestSigner(DEV_KEY)
-        self.signing_kid = config.get("security", {}).get("kid", "talos-dev-key")
+        # Keys either live in a local signing sidecar, or in-process where
+        # signing workers (if configured) run the crypto on a process pool.
+        # Each signer is registered under the alg it actually produces.
+        security_config = config.get("security", {})
+        signing_config = config.get("signing", {})
+        signing_workers = signing_config.get("workers", 0)
+        self.signing_kid = security_config.get("kid", "talos-dev-key")
+        self.eddsa_kid = security_config.get("eddsa_kid")
+
+        def local_signer(private_key_pem: str) -> RequestSignerPort:
+            if signing_workers:
+                return ProcessPoolRequestSigner(private_key_pem, max_workers=signing_workers)
+            return load_request_signer(private_key_pem)
+
+        sidecar = None
+        if signing_config.get("sidecar_socket"):
+            sidecar = SidecarRequestSigner(
+                signing_config["sidecar_socket"],
+                algorithm=signing_config.get("sidecar_algorithm", "ES256"),
+                max_batch=signing_config.get("sidecar_max_batch", 64),
+                batch_window=signing_config.get("sidecar_batch_window_seconds", 0.001)
+            )
+
+        # ES256 is every merchant's fallback, so a key for it is mandatory
+        if sidecar is not None and sidecar.algorithm == "ES256":
+            self.signer = sidecar
+        elif sidecar is not None and "private_key" not in security_config:
+            raise ValueError("An EdDSA signing sidecar needs an ES256 key as well (security.private_key)")
+        else:
+            self.signer = local_signer(DEV_KEY)
+        if self.signer.algorithm != "ES256":
+            raise ValueError("security.private_key must be an EC P-256 key; "
+                             "configure Ed25519 keys as security.eddsa_private_key")
+
+        # Optional EdDSA signer, used for merchants whose profile advertises EdDSA
+        eddsa_key = security_config.get("eddsa_private_key")
+        self.eddsa_signer = None
+        if sidecar is not None and sidecar.algorithm == "EdDSA":
+            if eddsa_key:
+                raise ValueError("Configure the EdDSA key in the signing sidecar or as "
+                                 "security.eddsa_private_key, not both")
+            self.eddsa_signer = sidecar
+        elif eddsa_key:
+            self.eddsa_signer = local_signer(eddsa_key)
+        if self.eddsa_signer is not None:
+            if not self.eddsa_kid:
+                raise ValueError("security.eddsa_kid is required with an EdDSA signing key")
+            if self.eddsa_signer.algorithm != "EdDSA":
+                raise ValueError("security.eddsa_private_key must be an Ed25519 key")
 
         # 3. Outbound Adapters
-        self.discovery_adapter = HttpDiscoveryAdapter()
-        self.merchant_checkout = HttpMerchantCheckoutAdapter()
+        # One TLS 1.3 context and one HTTP/2 pool per merchant host, shared by
+        # discovery and checkout so they reuse each other's connections.
+        http_config = config.get("http", {})
+        self.http_clients = HttpClientFactory(
+            http2=http_config.get("http2", True),
+            max_connections=http_config.get("max_connections", 20),
+            max_keepalive=http_config.get("max_keepalive", 10),
+            host_limits=http_config.get("hosts", {})
+        )
+        self.profile_http_cache = ProfileHttpCache()
+        self.discovery_adapter = HttpDiscoveryAdapter(client_factory=self.http_clients, http_cache=self.profile_http_cache)
+        self.merchant_checkout = HttpMerchantCheckoutAdapter(client_factory=self.http_clients)
+        self.async_discovery_adapter = AsyncHttpDiscoveryAdapter(client_factory=self.http_clients, http_cache=self.profile_http_cache)
+        self.async_merchant_checkout = AsyncHttpMerchantCheckoutAdapter(client_factory=self.http_clients)
         self.payment_adapter = SandboxPaymentAdapter()
+
+        # Merchant response / webhook signatures, checked against profile JWKS
+        verification_config = config.get("verification", {})
+        self.merchant_keys = MerchantKeyCache(
+            self.discovery_adapter,
+            ttl=verification_config.get("jwks_ttl_seconds", 300),
+            min_refresh_interval=verification_config.get("min_refresh_seconds", 30)
+        )
+        self.verifier = SignatureVerifier(self.merchant_keys)
         
         # 4. Domain Service (The Hexagon)
+        signing_preference = signing_config.get("prefer", SIGNING_PREFERENCE)
+        platform_profile_uri = config.get("platform_profile_uri", "talos-gateway")
+        discovery_config = config.get("discovery", {})
+        cache_dir = discovery_config.get("cache_dir")
+        self.discovery_cache = DiscoveryCache(
+            maxsize=discovery_config.get("max_entries", 1024),
+            ttl=discovery_config.get("ttl_seconds", 300),
+            stale_ttl=discovery_config.get("stale_ttl_seconds", 3600),
+            store=FileDiscoveryCacheStore(cache_dir) if cache_dir else None
+        )
         self.service = CommerceService(
             merchant_checkout=self.merchant_checkout,
             discovery=self.discovery_adapter,
@@ -46,6 +189,109 @@ AwEHoUQDQgAE9FsHcO9ApZ7CIg0ae0v8eCpTJn9yFLlWo/ckdc2DWJpqG6+Ab3IN
             config_store=self.config_store,
             audit=self.audit,
             payment=self.payment_adapter,
-            platform_profile_uri=config.get("platform_profile_uri", "talos-gateway"),
-            signing_kid=self.signing_kid
+            platform_profile_uri=platform_profile_uri,
+            signing_kid=self.signing_kid,
+            discovery_cache=self.discovery_cache,
+            eddsa_signer=self.eddsa_signer,
+            eddsa_kid=self.eddsa_kid,
+            signing_preference=signing_preference
         )
+        self.async_service = AsyncCommerceService(
+            merchant_checkout=self.async_merchant_checkout,
+            discovery=self.async_discovery_adapter,
+            signer=self.signer,
+            clock=self.clock,
+            replay_store=self.replay_store,
+            config_store=self.config_store,
+            audit=self.audit,
+            payment=self.payment_adapter,
+            platform_profile_uri=platform_profile_uri,
+            signing_kid=self.signing_kid,
+            discovery_cache=self.discovery_cache,
+            eddsa_signer=self.eddsa_signer,
+            eddsa_kid=self.eddsa_kid,
+            signing_preference=signing_preference
+        )
+
+        # 5. Inbound bridge: runs sync service calls off the event loop
+        executor_config = config.get("executor", {})
+        self.executor = ServiceExecutor(
+            max_workers=executor_config.get("max_workers", 32),
+            per_merchant_limit=executor_config.get("per_merchant_limit", 8)
+        )
+
+        # 6. Optional prewarm: discovery + pooled connections for allowlisted merchants
+        self.prewarm_config = config.get("prewarm", {})
+        self.ready = threading.Event()
+        self.prewarm_report: Dict[str, Any] = {}
+        if self.prewarm_config.get("enabled", False):
+            threading.Thread(target=self.prewarm, name="ucp-prewarm", daemon=True).start()
+        else:
+            self.ready.set()
+
+    def _warm_merchant(self, merchant_domain: str) -> None:
+        # Discovery fills the caches and leaves a pooled connection to the merchant host,
+        # unless the profile was already cached (e.g. loaded from the persistent store)
+        fetched = self.discovery_cache.get(merchant_domain) is None
+        base_url = self.service.resolve_endpoint(merchant_domain)
+        if not self.prewarm_config.get("open_connections", True):
+            return
+        if fetched and urlsplit(base_url).hostname == merchant_domain:
+            return
+        # Nothing was fetched, or the REST endpoint is on another host: open its pool
+        # (the response is irrelevant)
+        try:
+            self.http_clients.client_for(base_url).head(base_url)
+        except httpx.HTTPError:
+            pass
+
+    def prewarm(self) -> Dict[str, Any]:
+        """
+        Warms every allowlisted merchant in parallel, bounded by a deadline.
+        Sets `ready` once finished or once the deadline passes.
+        """
+        merchants = self.config_store.list_allowlisted_merchants()
+        deadline = self.prewarm_config.get("deadline_seconds", 10.0)
+        started = time.monotonic()
+        warmed, failed, timed_out = [], [], []
+        try:
+            if merchants:
+                pool = ThreadPoolExecutor(
+                    max_workers=min(self.prewarm_config.get("max_workers", 16), len(merchants)),
+                    thread_name_prefix="ucp-prewarm"
+                )
+                futures = {pool.submit(self._warm_merchant, m): m for m in merchants}
+                done, pending = wait(futures, timeout=deadline)
+                pool.shutdown(wait=False, cancel_futures=True)
+                for future in done:
+                    (failed if future.exception() else warmed).append(futures[future])
+                timed_out = [futures[f] for f in pending]
+        finally:
+            self.prewarm_report = {
+                "warmed": sorted(warmed),
+                "failed": sorted(failed),
+                "timed_out": sorted(timed_out),
+                "elapsed_ms": int((time.monotonic() - started) * 1000),
+            }
+            self.audit.emit_event("UCP_PREWARM_COMPLETE", self.prewarm_report)
+            self.ready.set()
+        return self.prewarm_report
+
+    def is_ready(self) -> bool:
+        return self.ready.is_set()
+
+    def close(self) -> None:
+        """Releases the pooled connections held by the sync adapters."""
+        self.service.close()
+        self.http_clients.close()
+        self.executor.shutdown(wait=False)
+        self.discovery_cache.close()
+        for signer in (self.signer, self.eddsa_signer):
+            if isinstance(signer, (ProcessPoolRequestSigner, SidecarRequestSigner)):
+                signer.close()
+        if isinstance(self.replay_store, (SqliteReplayStore, SharedMemoryReplayStore)):
+            self.replay_store.close()
+
+    async def aclose(self) -> None:
+        """Releases the pooled connections held by the async adapters."""
+        await self.http_clients.aclose()
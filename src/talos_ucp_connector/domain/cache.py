@@ -0,0 +1,184 @@
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Generic, Optional, TypeVar
+from cachetools import LRUCache
+from talos_ucp_connector.ports.spi import DiscoveryCacheStorePort
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+@dataclass(frozen=True)
+class CacheEntry:
+    value: Dict[str, Any]
+    fresh_until: float
+    stale_until: float
+
+class DiscoveryCache:
+    """
+    Bounded LRU cache of merchant discovery profiles.
+    Entries are fresh for `ttl` seconds, then served stale (while the caller
+    refreshes them) for up to `stale_ttl` more seconds before they count as a miss.
+    With a store, entries are written through and reloaded at construction, so
+    a restarted process starts warm. Deadlines are wall-clock for that reason.
+    Store writes run in order on one background thread, so neither request
+    threads nor the event loop wait on disk; flush() waits for them.
+    """
+    def __init__(self,
+                 maxsize: int = 1024,
+                 ttl: float = 300.0,
+                 stale_ttl: float = 3600.0,
+                 timer: Callable[[], float] = time.time,
+                 store: Optional[DiscoveryCacheStorePort] = None):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.timer = timer
+        self.store = store
+        self._entries: LRUCache = LRUCache(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self._writer: Optional[ThreadPoolExecutor] = None
+        if store is not None:
+            self._load(store)
+            self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ucp-discovery-store")
+
+    def _load(self, store: DiscoveryCacheStorePort) -> None:
+        now = self.timer()
+        records = sorted(store.load_all().items(), key=lambda item: item[1]["fresh_until"])
+        # Oldest first, so the freshest entries are the most recently used
+        for merchant_domain, record in records:
+            if record["stale_until"] <= now:
+                store.delete(merchant_domain)
+                continue
+            self._entries[merchant_domain] = CacheEntry(
+                value=record["profile"],
+                fresh_until=record["fresh_until"],
+                stale_until=record["stale_until"],
+            )
+
+    def _persist(self, fn: Callable[..., None], *args: Any) -> None:
+        def write() -> None:
+            try:
+                fn(*args)
+            except Exception as e:
+                logger.warning("Discovery cache store write failed for %s: %s", args[0], e)
+
+        assert self._writer is not None
+        self._writer.submit(write)
+
+    def flush(self) -> None:
+        """Waits for queued store writes to finish."""
+        if self._writer is not None:
+            self._writer.submit(lambda: None).result()
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.shutdown(wait=True)
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """Returns the entry unless it is absent or past its stale window."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.stale_until > self.timer():
+                return entry
+            del self._entries[key]
+        if self.store is not None:
+            self._persist(self.store.delete, key)
+        return None
+
+    def is_stale(self, entry: CacheEntry) -> bool:
+        return entry.fresh_until <= self.timer()
+
+    def put(self, key: str, value: Dict[str, Any], ttl: Optional[float] = None) -> CacheEntry:
+        now = self.timer()
+        fresh_until = now + (self.ttl if ttl is None else ttl)
+        entry = CacheEntry(value=value, fresh_until=fresh_until, stale_until=fresh_until + self.stale_ttl)
+        with self._lock:
+            self._entries[key] = entry
+        if self.store is not None:
+            self._persist(self.store.save, key, {
+                "profile": value,
+                "fresh_until": entry.fresh_until,
+                "stale_until": entry.stale_until,
+            })
+        return entry
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+        if self.store is not None:
+            self._persist(self.store.delete, key)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+@dataclass
+class _Call(Generic[T]):
+    done: threading.Event = field(default_factory=threading.Event)
+    result: Optional[T] = None
+    error: Optional[BaseException] = None
+
+class SingleFlight(Generic[T]):
+    """
+    Collapses concurrent calls for the same key onto one execution.
+    The first thread runs fn; threads arriving while it runs wait for and
+    share its result (or exception).
+    """
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call[T]] = {}
+
+    def do(self, key: str, fn: Callable[[], T]) -> T:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if call is None:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result  # type: ignore[return-value]
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+class AsyncSingleFlight(Generic[T]):
+    """
+    asyncio counterpart of SingleFlight.
+    The shared call runs as its own task, so cancelling one waiter does not
+    cancel the fetch the others are waiting on.
+    """
+    def __init__(self) -> None:
+        self._tasks: Dict[str, "asyncio.Task[T]"] = {}
+
+    def _finished(self, key: str, task: "asyncio.Task[T]") -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        # Mark the exception retrieved even if every waiter went away
+        if not task.cancelled():
+            task.exception()
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._tasks[key] = task
+            task.add_done_callback(lambda t: self._finished(key, t))
+        return await asyncio.shield(task)
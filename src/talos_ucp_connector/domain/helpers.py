@@ -1,6 +1,58 @@
+import base64
+import functools
+import hashlib
 import urllib.parse
-from typing import Dict, Any, Optional
+from dataclasses import dataclass
+from io import BytesIO
+from typing import IO, Dict, Any, Optional
 import http_sfv
+import rfc8785
+
+class CanonicalJSON(bytes):
+    """
+    JCS bytes standing in for a JSON value inside a signing envelope.
+    EnvelopeCanonicalizer splices them verbatim, so the body is serialized once
+    and the same bytes are both signed and sent. Plain rfc8785.dumps does not
+    accept them; sign envelopes through EnvelopeCanonicalizer.
+    """
+    @classmethod
+    def encode(cls, value: Any) -> "CanonicalJSON":
+        return cls(rfc8785.dumps(value))
+
+@dataclass(frozen=True)
+class RequestTemplate:
+    """
+    Per-(platform profile, merchant endpoint) constants for signed requests.
+    `headers` are the static wire headers; `signed_headers` is the same set
+    lowercased and canonicalized once for the signing envelope. `algorithm`
+    is the JWS alg negotiated with the merchant; with `content_digest` the
+    envelope signs an RFC 9530 Content-Digest header instead of the body.
+    """
+    platform_profile_uri: str
+    base_url: str
+    headers: Dict[str, str]
+    signed_headers: Dict[str, str]
+    algorithm: str = "ES256"
+    content_digest: bool = False
+
+    @classmethod
+    def build(cls,
+              platform_profile_uri: str,
+              base_url: str,
+              algorithm: str = "ES256",
+              content_digest: bool = False) -> "RequestTemplate":
+        headers = {
+            "UCP-Agent": f'profile="{platform_profile_uri}"',
+            "Content-Type": "application/json",
+        }
+        return cls(
+            platform_profile_uri=platform_profile_uri,
+            base_url=base_url,
+            headers=headers,
+            signed_headers=SigningHelper.canonicalize_headers(headers),
+            algorithm=algorithm,
+            content_digest=content_digest,
+        )
 
 class SigningHelper:
     @staticmethod
@@ -20,6 +72,20 @@ class SigningHelper:
             # Fallback if parsing fails, though spec says to reject
             return agent_str
 
+    @staticmethod
+    def content_digest(body: bytes) -> str:
+        """RFC 9530 Content-Digest field value (sha-256) for the exact body bytes."""
+        digest = base64.b64encode(hashlib.sha256(body).digest()).decode('ascii')
+        return f"sha-256=:{digest}:"
+
+    @classmethod
+    def canonicalize_headers(cls, headers: Dict[str, str]) -> Dict[str, str]:
+        """Lowercases names and canonicalizes UCP-Agent as the envelope requires."""
+        processed_headers = {k.lower(): v for k, v in headers.items()}
+        if 'ucp-agent' in processed_headers:
+            processed_headers['ucp-agent'] = cls.canonicalize_ucp_agent(processed_headers['ucp-agent'])
+        return processed_headers
+
     @classmethod
     def create_envelope(
         cls,
@@ -33,11 +99,8 @@ class SigningHelper:
     ) -> Dict[str, Any]:
         """Constructs the canonical signing envelope."""
         query_string = cls.canonicalize_query(query_params)
-        
-        processed_headers = {k.lower(): v for k, v in headers.items()}
-        if 'ucp-agent' in processed_headers:
-            processed_headers['ucp-agent'] = cls.canonicalize_ucp_agent(processed_headers['ucp-agent'])
-        
+        processed_headers = cls.canonicalize_headers(headers)
+
         envelope = {
             "method": method.upper(),
             "path": path,
@@ -50,3 +113,90 @@ class SigningHelper:
             }
         }
         return envelope
+
+    @classmethod
+    def create_envelope_from_template(
+        cls,
+        template: RequestTemplate,
+        method: str,
+        path: str,
+        query_params: Dict[str, str],
+        dynamic_headers: Dict[str, str],
+        body: Optional[CanonicalJSON],
+        iat: int,
+        jti: str
+    ) -> Dict[str, Any]:
+        """
+        Same envelope as create_envelope(headers=template.headers | dynamic_headers),
+        but only the per-request headers are processed and the body arrives
+        already canonicalized.
+        """
+        processed_headers = dict(template.signed_headers)
+        processed_headers.update(cls.canonicalize_headers(dynamic_headers))
+        return {
+            "method": method.upper(),
+            "path": path,
+            "query": cls.canonicalize_query(query_params) if query_params else "",
+            "headers": processed_headers,
+            "body": body,
+            "meta": {
+                "iat": iat,
+                "jti": jti
+            }
+        }
+
+def _utf16_key(key: str) -> bytes:
+    # RFC 8785 3.2.3: members are ordered by the UTF-16 code units of their names
+    return key.encode("utf-16be")
+
+class EnvelopeCanonicalizer:
+    """
+    RFC 8785 (JCS) serializer specialised for signing envelopes.
+    String members (method, path, query) and header entries repeat across
+    requests, so their `"name":"value"` fragments are memoized and spliced in;
+    only body and meta go through the full canonicalizer on each call.
+    Output is byte-identical to rfc8785.dumps.
+    """
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def _member(key: str, value: str) -> bytes:
+        return rfc8785.dumps(key) + b":" + rfc8785.dumps(value)
+
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def _name(key: str) -> bytes:
+        return rfc8785.dumps(key) + b":"
+
+    @classmethod
+    def _dump_object(cls, obj: Dict[str, Any], sink: IO[bytes], splice_nested: bool) -> None:
+        if not obj:
+            sink.write(b"{}")
+            return
+        try:
+            keys = sorted(obj, key=_utf16_key)
+        except AttributeError:
+            raise rfc8785.CanonicalizationError("object keys must be strings")
+
+        sink.write(b"{")
+        for idx, key in enumerate(keys):
+            if idx:
+                sink.write(b",")
+            value = obj[key]
+            if type(value) is str:
+                sink.write(cls._member(key, value))
+            elif type(value) is CanonicalJSON:
+                sink.write(cls._name(key))
+                sink.write(value)
+            elif splice_nested and type(value) is dict and all(type(v) is str for v in value.values()):
+                sink.write(cls._name(key))
+                cls._dump_object(value, sink, splice_nested=False)
+            else:
+                sink.write(cls._name(key))
+                rfc8785.dump(value, sink)
+        sink.write(b"}")
+
+    @classmethod
+    def dumps(cls, envelope: Dict[str, Any]) -> bytes:
+        sink = BytesIO()
+        cls._dump_object(envelope, sink, splice_nested=True)
+        return sink.getvalue()
@@ -1,30 +1,47 @@
+import asyncio
+import threading
 import uuid
-from typing import Dict, Any, Optional, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, List, Sequence, Set, Tuple
 from talos_ucp_connector.ports.spi import (
-    CheckoutLifecycleInboundPort, 
+    CheckoutLifecycleInboundPort,
     OrderManagementInboundPort,
     IdentityInboundPort,
     DiscoveryInboundPort,
     ConfigurationInboundPort,
+    AsyncCheckoutLifecycleInboundPort,
+    AsyncOrderManagementInboundPort,
+    AsyncIdentityInboundPort,
+    AsyncDiscoveryInboundPort,
     MerchantCheckoutPort,
+    AsyncMerchantCheckoutPort,
     DiscoveryPort,
+    AsyncDiscoveryPort,
     RequestSignerPort,
     ClockPort,
     ReplayStorePort,
     ConfigStorePort,
     AuditPort,
-    PaymentPort
+    PaymentPort,
+    DiscoveredProfile
 )
-from talos_ucp_connector.domain.helpers import SigningHelper
+from talos_ucp_connector.domain.cache import DiscoveryCache, SingleFlight, AsyncSingleFlight
+from cachetools import LRUCache
+from talos_ucp_connector.domain.helpers import SigningHelper, RequestTemplate, CanonicalJSON
 
-class CommerceService(CheckoutLifecycleInboundPort, OrderManagementInboundPort, IdentityInboundPort, DiscoveryInboundPort, ConfigurationInboundPort):
+# JWS algorithms in order of preference when a merchant advertises several.
+# ES256 first: with the `cryptography` backend it signs faster than Ed25519
+# at every cart size (benchmarks/baselines/signing.json)
+SIGNING_PREFERENCE = ("ES256", "EdDSA")
+
+class _CommerceServiceBase(ConfigurationInboundPort):
     """
-    Core Domain Service. 
-    Orchestrates UCP flows using strict hexagonal ports.
+    I/O-free orchestration shared by the sync and async services.
+    Subclasses only differ in how they call the outbound ports.
     """
-    def __init__(self, 
-                 merchant_checkout: MerchantCheckoutPort,
-                 discovery: DiscoveryPort,
+    def __init__(self,
+                 merchant_checkout: Any,
+                 discovery: Any,
                  signer: RequestSignerPort,
                  clock: ClockPort,
                  replay_store: ReplayStorePort,
@@ -32,7 +49,11 @@ class CommerceService(CheckoutLifecycleInboundPort, OrderManagementInboundPort,
                  audit: AuditPort,
                  payment: PaymentPort,
                  platform_profile_uri: str,
-                 signing_kid: str):
+                 signing_kid: str,
+                 discovery_cache: Optional[DiscoveryCache] = None,
+                 eddsa_signer: Optional[RequestSignerPort] = None,
+                 eddsa_kid: Optional[str] = None,
+                 signing_preference: Sequence[str] = SIGNING_PREFERENCE):
         self.merchant_checkout = merchant_checkout
         self.discovery = discovery
         self.signer = signer
@@ -43,61 +64,137 @@ class CommerceService(CheckoutLifecycleInboundPort, OrderManagementInboundPort,
         self.payment = payment
         self.platform_profile_uri = platform_profile_uri
         self.signing_kid = signing_kid
-        
-        # In-memory discovery cache (Merchant domain -> REST endpoint)
-        self._endpoint_cache: Dict[str, str] = {}
 
-    def _get_base_url(self, merchant_domain: str) -> str:
-        """Normative discovery of the merchant's UCP endpoint."""
-        if merchant_domain in self._endpoint_cache:
-            return self._endpoint_cache[merchant_domain]
-            
-        profile = self.discovery.fetch_profile(merchant_domain)
+        # alg -> (signer, kid); ES256 is always available as the fallback
+        self._signers: Dict[str, Tuple[RequestSignerPort, str]] = {"ES256": (signer, signing_kid)}
+        if eddsa_signer is not None:
+            if not eddsa_kid:
+                # The ES256 kid would make merchants resolve the wrong key
+                raise ValueError("eddsa_kid is required with an EdDSA signer")
+            self._signers["EdDSA"] = (eddsa_signer, eddsa_kid)
+        self.signing_preference = tuple(signing_preference)
+
+        # Bounded discovery cache (Merchant domain -> UCP profile), served
+        # stale while a background refresh runs
+        self._discovery_cache = discovery_cache if discovery_cache is not None else DiscoveryCache()
+
+        # (merchant domain, endpoint) -> precomputed static headers for signing
+        self._templates: LRUCache = LRUCache(maxsize=1024)
+        self._templates_lock = threading.Lock()
+
+    @staticmethod
+    def _endpoint_from_profile(merchant_domain: str, profile: Dict[str, Any]) -> str:
         # Assuming rest.endpoint is in the profile per spec
         endpoint = profile.get("services", {}).get("dev.ucp.shopping", {}).get("rest", {}).get("endpoint")
         if not endpoint:
             # Fallback for dev if not in profile, but in prod we should fail
             endpoint = f"https://{merchant_domain}/api/shopping/v1"
-        
-        self._endpoint_cache[merchant_domain] = endpoint
         return endpoint
 
-    def _execute_signed_request(self, 
-                                merchant_domain: str, 
-                                method: str, 
-                                path: str, 
-                                query_params: Dict[str, str], 
-                                body: Optional[Dict[str, Any]], 
-                                idempotency_key: Optional[str] = None) -> Dict[str, Any]:
-        """Orchestrates the construction, signing, and execution of a UCP request."""
-        base_url = self._get_base_url(merchant_domain)
-        full_url = f"{base_url}{path}"
+    @staticmethod
+    def _domain_from_did(merchant_did: str) -> str:
+        # Simple did:web resolution placeholder
+        if merchant_did.startswith("did:web:"):
+            return merchant_did.split("did:web:")[1]
+        # Fallback to direct domain if not DID formatted
+        return merchant_did
+
+    def _refresh_failed(self, merchant_domain: str, error: Exception) -> None:
+        # Keep serving the stale profile; the next stale hit retries
+        self.audit.emit_event("UCP_DISCOVERY_REFRESH_FAILURE", {"merchant": merchant_domain, "error": str(error)})
+
+    def _cache_profile(self, merchant_domain: str, discovered: DiscoveredProfile) -> Dict[str, Any]:
+        # The merchant's max-age / no-cache sets the freshness; no-store keeps it out entirely
+        if discovered.cacheable:
+            self._discovery_cache.put(merchant_domain, discovered.profile, ttl=discovered.ttl)
+        else:
+            self._discovery_cache.invalidate(merchant_domain)
+        return discovered.profile
+
+    def _signing_algorithm(self, profile: Dict[str, Any]) -> str:
+        """Picks the preferred alg the merchant advertises and we hold a key for."""
+        advertised = profile.get("request_signing", {}).get("algorithms") or ()
+        for alg in self.signing_preference:
+            if alg in advertised and alg in self._signers:
+                return alg
+        return "ES256"
+
+    @staticmethod
+    def _content_digest_enabled(profile: Dict[str, Any]) -> bool:
+        """Whether the merchant accepts a signed sha-256 Content-Digest in place of the body."""
+        return "sha-256" in (profile.get("request_signing", {}).get("content_digest") or ())
+
+    def _template_for(self,
+                      merchant_domain: str,
+                      base_url: str,
+                      algorithm: str = "ES256",
+                      content_digest: bool = False) -> RequestTemplate:
+        # Keyed by endpoint and signing options too, so a merchant that moves
+        # or changes what it accepts gets a fresh template
+        key = (merchant_domain, base_url, algorithm, content_digest)
+        with self._templates_lock:
+            template = self._templates.get(key)
+            if template is None:
+                template = RequestTemplate.build(self.platform_profile_uri, base_url, algorithm, content_digest)
+                self._templates[key] = template
+        return template
+
+    def _template_for_profile(self, merchant_domain: str, profile: Dict[str, Any]) -> RequestTemplate:
+        return self._template_for(
+            merchant_domain,
+            self._endpoint_from_profile(merchant_domain, profile),
+            self._signing_algorithm(profile),
+            self._content_digest_enabled(profile)
+        )
+
+    def _build_request(self,
+                       template: RequestTemplate,
+                       method: str,
+                       path: str,
+                       query_params: Dict[str, str],
+                       body: Optional[Dict[str, Any]],
+                       idempotency_key: Optional[str] = None
+                       ) -> Tuple[str, Dict[str, str], Dict[str, Any], Optional[bytes], str]:
+        """
+        Builds the target URL, the unsigned header set, the signing envelope and
+        the request body. The body is canonicalized once; those exact bytes are
+        signed and sent.
+        """
+        full_url = f"{template.base_url}{path}"
         if query_params:
             full_url += f"?{SigningHelper.canonicalize_query(query_params)}"
 
-        # 1. Prepare global headers
+        # 1. Per-request headers; the static ones come from the template
         jti = str(uuid.uuid4())
         iat = self.clock.now()
-        
-        headers = {
-            "UCP-Agent": f'profile="{self.platform_profile_uri}"',
-            "Content-Type": "application/json",
-            "Talos-Signature-Meta": f'iat={iat},jti="{jti}"'
-        }
+
+        dynamic_headers = {"Talos-Signature-Meta": f'iat={iat},jti="{jti}"'}
         if idempotency_key:
-            headers["Idempotency-Key"] = idempotency_key
-        
-        envelope = SigningHelper.create_envelope(
+            dynamic_headers["Idempotency-Key"] = idempotency_key
+        body_bytes = CanonicalJSON.encode(body) if body is not None else None
+        signed_body = body_bytes
+        if body_bytes is not None and template.content_digest:
+            # The signed digest stands in for the body, so signing cost no
+            # longer grows with the cart
+            dynamic_headers["Content-Digest"] = SigningHelper.content_digest(body_bytes)
+            signed_body = None
+        headers = {**template.headers, **dynamic_headers}
+
+        envelope = SigningHelper.create_envelope_from_template(
+            template=template,
             method=method,
             path=path,
             query_params=query_params,
-            headers=headers,
-            body=body,
+            dynamic_headers=dynamic_headers,
+            body=signed_body,
             iat=iat,
             jti=jti
         )
-        
-        signature = self.signer.sign(envelope, self.signing_kid)
+        # CanonicalJSON is bytes, so the signed body goes out without a copy;
+        # bodiless POSTs keep sending "{}" (unsigned, as before)
+        return full_url, headers, envelope, body_bytes, jti
+
+    def _attach_signature(self, method: str, full_url: str, headers: Dict[str, str], signature: str, jti: str) -> None:
         headers["Request-Signature"] = signature
 
         # 3. Emit Audit Intent
@@ -108,17 +205,129 @@ class CommerceService(CheckoutLifecycleInboundPort, OrderManagementInboundPort,
             "jti": jti
         })
 
+    def _prepare_signed_request(self,
+                                template: RequestTemplate,
+                                method: str,
+                                path: str,
+                                query_params: Dict[str, str],
+                                body: Optional[Dict[str, Any]],
+                                idempotency_key: Optional[str] = None) -> Tuple[str, Dict[str, str], Optional[bytes]]:
+        """Builds and signs a UCP request on the calling thread."""
+        full_url, headers, envelope, content, jti = self._build_request(
+            template, method, path, query_params, body, idempotency_key
+        )
+        # 2. Sign with the merchant's negotiated algorithm
+        signer, kid = self._signers[template.algorithm]
+        signature = signer.sign(envelope, kid)
+        self._attach_signature(method, full_url, headers, signature, jti)
+        return full_url, headers, content
+
+    def _require_allowlisted(self, merchant_domain: str) -> None:
+        if not self.config_store.is_merchant_allowlisted(merchant_domain):
+            raise ValueError("UCP_POLICY_DENIED: Merchant not allowlisted")
+
+    @staticmethod
+    def _with_extensions(payload: Dict[str, Any], extensions: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        if extensions:
+            payload["extensions"] = extensions
+        return payload
+
+    # --- ConfigurationInboundPort ---
+
+    def get_merchant_config(self, merchant_domain: str) -> Dict[str, Any]:
+        return self.config_store.get_merchant_policy(merchant_domain)
+
+    def update_merchant_config(self, merchant_domain: str, config: Dict[str, Any]) -> None:
+        # In this prototype, we just emit audit and assume persistence in adapter
+        self.audit.emit_event("CONFIG_UPDATE", {"merchant": merchant_domain, "config": config})
+
+class CommerceService(_CommerceServiceBase, CheckoutLifecycleInboundPort, OrderManagementInboundPort, IdentityInboundPort, DiscoveryInboundPort):
+    """
+    Core Domain Service.
+    Orchestrates UCP flows using strict hexagonal ports.
+    """
+    merchant_checkout: MerchantCheckoutPort
+    discovery: DiscoveryPort
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._refreshing: Set[str] = set()
+        self._refresh_lock = threading.Lock()
+        self._refresh_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="ucp-discovery")
+        self._discovery_flight: SingleFlight[Dict[str, Any]] = SingleFlight()
+
+    def _load_profile(self, merchant_domain: str) -> Dict[str, Any]:
+        return self._cache_profile(merchant_domain, self.discovery.discover(merchant_domain))
+
+    def _fetch_profile(self, merchant_domain: str) -> Dict[str, Any]:
+        # One /.well-known/ucp fetch per domain, however many callers are cold
+        return self._discovery_flight.do(merchant_domain, lambda: self._load_profile(merchant_domain))
+
+    def _background_refresh(self, merchant_domain: str) -> None:
+        try:
+            self._fetch_profile(merchant_domain)
+        except Exception as e:
+            self._refresh_failed(merchant_domain, e)
+        finally:
+            with self._refresh_lock:
+                self._refreshing.discard(merchant_domain)
+
+    def _schedule_refresh(self, merchant_domain: str) -> None:
+        with self._refresh_lock:
+            if merchant_domain in self._refreshing:
+                return
+            self._refreshing.add(merchant_domain)
+        try:
+            self._refresh_pool.submit(self._background_refresh, merchant_domain)
+        except RuntimeError:
+            # Closed: keep serving the stale profile without refreshing it
+            with self._refresh_lock:
+                self._refreshing.discard(merchant_domain)
+
+    def close(self) -> None:
+        """Stops the background discovery refreshes; queued ones are dropped."""
+        self._refresh_pool.shutdown(wait=False, cancel_futures=True)
+
+    def _get_profile(self, merchant_domain: str) -> Dict[str, Any]:
+        entry = self._discovery_cache.get(merchant_domain)
+        if entry is None:
+            return self._fetch_profile(merchant_domain)
+        if self._discovery_cache.is_stale(entry):
+            self._schedule_refresh(merchant_domain)
+        return entry.value
+
+    def _get_base_url(self, merchant_domain: str) -> str:
+        """Normative discovery of the merchant's UCP endpoint."""
+        return self._endpoint_from_profile(merchant_domain, self._get_profile(merchant_domain))
+
+    def resolve_endpoint(self, merchant_domain: str) -> str:
+        """Discovers (or returns the cached) UCP endpoint, e.g. to prewarm the cache."""
+        return self._get_base_url(merchant_domain)
+
+    def _execute_signed_request(self,
+                                merchant_domain: str,
+                                method: str,
+                                path: str,
+                                query_params: Dict[str, str],
+                                body: Optional[Dict[str, Any]],
+                                idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+        """Orchestrates the construction, signing, and execution of a UCP request."""
+        template = self._template_for_profile(merchant_domain, self._get_profile(merchant_domain))
+        full_url, headers, content = self._prepare_signed_request(
+            template, method, path, query_params, body, idempotency_key
+        )
+
         # 4. Execute via Outbound Port
         try:
             if method == "POST":
-                resp = self.merchant_checkout.post_checkout(full_url, body or {}, headers)
+                resp = self.merchant_checkout.post_checkout(full_url, body or {}, headers, content=content)
             elif method == "PUT":
-                resp = self.merchant_checkout.put_checkout(full_url, body or {}, headers)
+                resp = self.merchant_checkout.put_checkout(full_url, body or {}, headers, content=content)
             elif method == "GET":
                 resp = self.merchant_checkout.get_checkout(full_url, headers)
             else:
                 raise ValueError(f"Unsupported method: {method}")
-            
+
             self.audit.emit_event("UCP_REQUEST_SUCCESS", {"url": full_url})
             return resp
         except Exception as e:
@@ -129,13 +338,8 @@ class CommerceService(CheckoutLifecycleInboundPort, OrderManagementInboundPort,
     # --- CheckoutLifecycleInboundPort ---
 
     def create_checkout(self, merchant_domain: str, line_items: list, currency: str, extensions: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-        if not self.config_store.is_merchant_allowlisted(merchant_domain):
-            raise ValueError("UCP_POLICY_DENIED: Merchant not allowlisted")
-            
-        payload = {"line_items": line_items, "currency": currency, "mode": "payment"}
-        if extensions:
-            payload["extensions"] = extensions
-
+        self._require_allowlisted(merchant_domain)
+        payload = self._with_extensions({"line_items": line_items, "currency": currency, "mode": "payment"}, extensions)
         return self._execute_signed_request(
             merchant_domain, "POST", "/checkout-sessions", {}, payload, str(uuid.uuid4())
         )
@@ -147,10 +351,7 @@ class CommerceService(CheckoutLifecycleInboundPort, OrderManagementInboundPort,
 
     def update_checkout(self, merchant_domain: str, session_id: str, checkout_payload: Dict[str, Any], extensions: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         # Note: PUT per spec
-        payload = dict(checkout_payload)
-        if extensions:
-            payload["extensions"] = extensions
-            
+        payload = self._with_extensions(dict(checkout_payload), extensions)
         return self._execute_signed_request(
             merchant_domain, "PUT", f"/checkout-sessions/{session_id}", {}, payload, str(uuid.uuid4())
         )
@@ -158,7 +359,7 @@ class CommerceService(CheckoutLifecycleInboundPort, OrderManagementInboundPort,
     def complete_checkout(self, merchant_domain: str, session_id: str, amount_minor: int, currency: str) -> Dict[str, Any]:
         # 1. Payment Credentials
         payment_data = self.payment.get_credentials(currency, amount_minor, merchant_domain)
-        
+
         # 2. Complete POST
         payload = {"payment_data": payment_data}
         return self._execute_signed_request(
@@ -199,20 +400,145 @@ class CommerceService(CheckoutLifecycleInboundPort, OrderManagementInboundPort,
         """
         Resolves UCP manifest from merchant DID (assuming did:web mapping for now).
         """
-        # Simple did:web resolution placeholder
-        if merchant_did.startswith("did:web:"):
-            domain = merchant_did.split("did:web:")[1]
-        else:
-            # Fallback to direct domain if not DID formatted
-            domain = merchant_did
-            
-        return self.discovery_outbound.fetch_profile(domain)
+        return self.discovery.fetch_profile(self._domain_from_did(merchant_did))
 
-    # --- ConfigurationInboundPort ---
+class AsyncCommerceService(_CommerceServiceBase, AsyncCheckoutLifecycleInboundPort, AsyncOrderManagementInboundPort, AsyncIdentityInboundPort, AsyncDiscoveryInboundPort):
+    """
+    asyncio variant of CommerceService.
+    Outbound I/O is awaited, so a slow merchant only suspends its own coroutine.
+    """
+    merchant_checkout: AsyncMerchantCheckoutPort
+    discovery: AsyncDiscoveryPort
 
-    def get_merchant_config(self, merchant_domain: str) -> Dict[str, Any]:
-        return self.config_store.get_merchant_policy(merchant_domain)
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._refresh_tasks: Dict[str, "asyncio.Task[None]"] = {}
+        self._discovery_flight: AsyncSingleFlight[Dict[str, Any]] = AsyncSingleFlight()
 
-    def update_merchant_config(self, merchant_domain: str, config: Dict[str, Any]) -> None:
-        # In this prototype, we just emit audit and assume persistence in adapter
-        self.audit.emit_event("CONFIG_UPDATE", {"merchant": merchant_domain, "config": config})
+    async def _load_profile(self, merchant_domain: str) -> Dict[str, Any]:
+        return self._cache_profile(merchant_domain, await self.discovery.discover(merchant_domain))
+
+    async def _fetch_profile(self, merchant_domain: str) -> Dict[str, Any]:
+        # One /.well-known/ucp fetch per domain, however many coroutines are cold
+        return await self._discovery_flight.do(merchant_domain, lambda: self._load_profile(merchant_domain))
+
+    async def _background_refresh(self, merchant_domain: str) -> None:
+        try:
+            await self._fetch_profile(merchant_domain)
+        except Exception as e:
+            self._refresh_failed(merchant_domain, e)
+        finally:
+            self._refresh_tasks.pop(merchant_domain, None)
+
+    def _schedule_refresh(self, merchant_domain: str) -> None:
+        if merchant_domain in self._refresh_tasks:
+            return
+        self._refresh_tasks[merchant_domain] = asyncio.get_running_loop().create_task(
+            self._background_refresh(merchant_domain)
+        )
+
+    async def _get_profile(self, merchant_domain: str) -> Dict[str, Any]:
+        entry = self._discovery_cache.get(merchant_domain)
+        if entry is None:
+            return await self._fetch_profile(merchant_domain)
+        if self._discovery_cache.is_stale(entry):
+            self._schedule_refresh(merchant_domain)
+        return entry.value
+
+    async def _get_base_url(self, merchant_domain: str) -> str:
+        """Normative discovery of the merchant's UCP endpoint."""
+        return self._endpoint_from_profile(merchant_domain, await self._get_profile(merchant_domain))
+
+    async def _execute_signed_request(self,
+                                      merchant_domain: str,
+                                      method: str,
+                                      path: str,
+                                      query_params: Dict[str, str],
+                                      body: Optional[Dict[str, Any]],
+                                      idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+        """Orchestrates the construction, signing, and execution of a UCP request."""
+        template = self._template_for_profile(merchant_domain, await self._get_profile(merchant_domain))
+        full_url, headers, envelope, content, jti = self._build_request(
+            template, method, path, query_params, body, idempotency_key
+        )
+        # 2. Sign without blocking the event loop (signers may offload the crypto)
+        signer, kid = self._signers[template.algorithm]
+        signature = await signer.sign_async(envelope, kid)
+        self._attach_signature(method, full_url, headers, signature, jti)
+
+        try:
+            if method == "POST":
+                resp = await self.merchant_checkout.post_checkout(full_url, body or {}, headers, content=content)
+            elif method == "PUT":
+                resp = await self.merchant_checkout.put_checkout(full_url, body or {}, headers, content=content)
+            elif method == "GET":
+                resp = await self.merchant_checkout.get_checkout(full_url, headers)
+            else:
+                raise ValueError(f"Unsupported method: {method}")
+
+            self.audit.emit_event("UCP_REQUEST_SUCCESS", {"url": full_url})
+            return resp
+        except Exception as e:
+            self.audit.emit_event("UCP_REQUEST_FAILURE", {"url": full_url, "error": str(e)})
+            raise e
+
+    # --- AsyncCheckoutLifecycleInboundPort ---
+
+    async def create_checkout(self, merchant_domain: str, line_items: list, currency: str, extensions: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        self._require_allowlisted(merchant_domain)
+        payload = self._with_extensions({"line_items": line_items, "currency": currency, "mode": "payment"}, extensions)
+        return await self._execute_signed_request(
+            merchant_domain, "POST", "/checkout-sessions", {}, payload, str(uuid.uuid4())
+        )
+
+    async def get_checkout(self, merchant_domain: str, session_id: str) -> Dict[str, Any]:
+        return await self._execute_signed_request(
+            merchant_domain, "GET", f"/checkout-sessions/{session_id}", {}, None
+        )
+
+    async def update_checkout(self, merchant_domain: str, session_id: str, checkout_payload: Dict[str, Any], extensions: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        payload = self._with_extensions(dict(checkout_payload), extensions)
+        return await self._execute_signed_request(
+            merchant_domain, "PUT", f"/checkout-sessions/{session_id}", {}, payload, str(uuid.uuid4())
+        )
+
+    async def complete_checkout(self, merchant_domain: str, session_id: str, amount_minor: int, currency: str) -> Dict[str, Any]:
+        payment_data = self.payment.get_credentials(currency, amount_minor, merchant_domain)
+        payload = {"payment_data": payment_data}
+        return await self._execute_signed_request(
+            merchant_domain, "POST", f"/checkout-sessions/{session_id}/complete", {}, payload, str(uuid.uuid4())
+        )
+
+    async def cancel_checkout(self, merchant_domain: str, session_id: str) -> Dict[str, Any]:
+        return await self._execute_signed_request(
+            merchant_domain, "POST", f"/checkout-sessions/{session_id}/cancel", {}, None, str(uuid.uuid4())
+        )
+
+    # --- AsyncOrderManagementInboundPort ---
+
+    async def get_order(self, merchant_domain: str, order_id: str) -> Dict[str, Any]:
+        return await self._execute_signed_request(
+            merchant_domain, "GET", f"/orders/{order_id}", {}, None
+        )
+
+    async def list_orders(self, merchant_domain: str, limit: int = 100) -> List[Dict[str, Any]]:
+        resp = await self._execute_signed_request(
+            merchant_domain, "GET", "/orders", {"limit": str(limit)}, None
+        )
+        return resp.get("items", []) if isinstance(resp, dict) else []
+
+    # --- AsyncIdentityInboundPort ---
+
+    async def link_identity(self, merchant_domain: str, principal_id: str, ucp_buyer_id: str) -> Dict[str, Any]:
+        payload = {"principal_id": principal_id, "ucp_buyer_id": ucp_buyer_id}
+        return await self._execute_signed_request(
+            merchant_domain, "POST", "/identity/link", {}, payload, str(uuid.uuid4())
+        )
+
+    # --- AsyncDiscoveryInboundPort ---
+
+    async def discover_merchant(self, merchant_did: str) -> Dict[str, Any]:
+        """
+        Resolves UCP manifest from merchant DID (assuming did:web mapping for now).
+        """
+        return await self.discovery.fetch_profile(self._domain_from_did(merchant_did))
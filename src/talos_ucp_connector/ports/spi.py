@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, NamedTuple, Optional
 
 # --- INBOUND PORTS (Primary) ---
 
@@ -52,15 +52,58 @@ class ConfigurationInboundPort(ABC):
     def update_merchant_config(self, merchant_domain: str, config: Dict[str, Any]) -> None:
         pass
 
+# --- ASYNC INBOUND PORTS (Primary) ---
+
+class AsyncCheckoutLifecycleInboundPort(ABC):
+    @abstractmethod
+    async def create_checkout(self, merchant_domain: str, line_items: list, currency: str) -> Dict[str, Any]:
+        pass
+
+    @abstractmethod
+    async def get_checkout(self, merchant_domain: str, session_id: str) -> Dict[str, Any]:
+        pass
+
+    @abstractmethod
+    async def update_checkout(self, merchant_domain: str, session_id: str, checkout_payload: Dict[str, Any]) -> Dict[str, Any]:
+        pass
+
+    @abstractmethod
+    async def complete_checkout(self, merchant_domain: str, session_id: str, amount_minor: int, currency: str) -> Dict[str, Any]:
+        pass
+
+    @abstractmethod
+    async def cancel_checkout(self, merchant_domain: str, session_id: str) -> Dict[str, Any]:
+        pass
+
+class AsyncOrderManagementInboundPort(ABC):
+    @abstractmethod
+    async def get_order(self, merchant_domain: str, order_id: str) -> Dict[str, Any]:
+        pass
+
+    @abstractmethod
+    async def list_orders(self, merchant_domain: str, limit: int = 100) -> List[Dict[str, Any]]:
+        pass
+
+class AsyncIdentityInboundPort(ABC):
+    @abstractmethod
+    async def link_identity(self, merchant_domain: str, principal_id: str, ucp_buyer_id: str) -> Dict[str, Any]:
+        pass
+
+class AsyncDiscoveryInboundPort(ABC):
+    @abstractmethod
+    async def discover_merchant(self, merchant_did: str) -> Dict[str, Any]:
+        pass
+
 # --- OUTBOUND PORTS (Secondary) ---
 
 class MerchantCheckoutPort(ABC):
+    """`content`, when given, is the exact (signed) request body to send instead of encoding `payload`."""
     @abstractmethod
-    def post_checkout(self, url: str, payload: Dict[str, Any], headers: Dict[str, str]) -> Dict[str, Any]:
+    def post_checkout(self, url: str, payload: Dict[str, Any], headers: Dict[str, str], content: Optional[bytes] = None) -> Dict[str, Any]:
         pass
 
     @abstractmethod
-    def put_checkout(self, url: str, payload: Dict[str, Any], headers: Dict[str, str]) -> Dict[str, Any]:
+    def put_checkout(self, url: str, payload: Dict[str, Any], headers: Dict[str, str], content: Optional[bytes] = None) -> Dict[str, Any]:
         pass
 
     @abstractmethod
@@ -75,16 +118,90 @@ class MerchantCheckoutPort(ABC):
     def list_orders(self, url: str, headers: Dict[str, str]) -> List[Dict[str, Any]]:
         pass
 
+class DiscoveredProfile(NamedTuple):
+    """A merchant profile plus the caching its response allows."""
+    profile: Dict[str, Any]
+    # Freshness lifetime in seconds; None leaves it to the cache's default
+    ttl: Optional[float] = None
+    # False for Cache-Control: no-store
+    cacheable: bool = True
+
 class DiscoveryPort(ABC):
     @abstractmethod
     def fetch_profile(self, merchant_domain: str) -> Dict[str, Any]:
         pass
 
+    def discover(self, merchant_domain: str, revalidate: bool = False) -> DiscoveredProfile:
+        """
+        fetch_profile() with the freshness the merchant sent, where the adapter knows it.
+        `revalidate` asks adapters with their own cache to check with the merchant.
+        """
+        return DiscoveredProfile(self.fetch_profile(merchant_domain))
+
+class AsyncMerchantCheckoutPort(ABC):
+    @abstractmethod
+    async def post_checkout(self, url: str, payload: Dict[str, Any], headers: Dict[str, str], content: Optional[bytes] = None) -> Dict[str, Any]:
+        pass
+
+    @abstractmethod
+    async def put_checkout(self, url: str, payload: Dict[str, Any], headers: Dict[str, str], content: Optional[bytes] = None) -> Dict[str, Any]:
+        pass
+
+    @abstractmethod
+    async def get_checkout(self, url: str, headers: Dict[str, str]) -> Dict[str, Any]:
+        pass
+
+    @abstractmethod
+    async def get_order(self, url: str, headers: Dict[str, str]) -> Dict[str, Any]:
+        pass
+
+    @abstractmethod
+    async def list_orders(self, url: str, headers: Dict[str, str]) -> List[Dict[str, Any]]:
+        pass
+
+class AsyncDiscoveryPort(ABC):
+    @abstractmethod
+    async def fetch_profile(self, merchant_domain: str) -> Dict[str, Any]:
+        pass
+
+    async def discover(self, merchant_domain: str, revalidate: bool = False) -> DiscoveredProfile:
+        """
+        fetch_profile() with the freshness the merchant sent, where the adapter knows it.
+        `revalidate` asks adapters with their own cache to check with the merchant.
+        """
+        return DiscoveredProfile(await self.fetch_profile(merchant_domain))
+
 class RequestSignerPort(ABC):
     @abstractmethod
     def sign(self, envelope: Dict[str, Any], kid: str) -> str:
         pass
 
+    @property
+    def algorithm(self) -> str:
+        """JWS alg of the signatures this signer produces."""
+        return "ES256"
+
+    async def sign_async(self, envelope: Dict[str, Any], kid: str) -> str:
+        """Awaitable sign(); signers that can offload the crypto override this."""
+        return self.sign(envelope, kid)
+
+    def sign_many(self, envelopes: List[Dict[str, Any]], kid: str) -> List[str]:
+        """Signs a batch under one kid; signatures come back in input order."""
+        return [self.sign(envelope, kid) for envelope in envelopes]
+
+    async def sign_many_async(self, envelopes: List[Dict[str, Any]], kid: str) -> List[str]:
+        return self.sign_many(envelopes, kid)
+
+class SignatureVerifierPort(ABC):
+    """Checks detached JWS signatures produced by a merchant (responses, webhooks)."""
+    @abstractmethod
+    def verify(self, merchant_domain: str, signature: str, envelope: Dict[str, Any]) -> bool:
+        pass
+
+    @abstractmethod
+    def verify_bytes(self, merchant_domain: str, signature: str, payload: bytes) -> bool:
+        pass
+
 class ClockPort(ABC):
     @abstractmethod
     def now(self) -> int:
@@ -96,6 +213,10 @@ class ReplayStorePort(ABC):
         """Returns True if nonce is new/valid, False if replayed."""
         pass
 
+    def store_nonce(self, merchant_id: str, kid: str, jti: str) -> None:
+        """Records a nonce already known to be new (e.g. by a pre-filter)."""
+        self.check_and_store_nonce(merchant_id, kid, jti)
+
 class ConfigStorePort(ABC):
     @abstractmethod
     def get_merchant_policy(self, merchant_domain: str) -> Dict[str, Any]:
@@ -105,6 +226,25 @@ class ConfigStorePort(ABC):
     def is_merchant_allowlisted(self, merchant_domain: str) -> bool:
         pass
 
+    @abstractmethod
+    def list_allowlisted_merchants(self) -> List[str]:
+        pass
+
+class DiscoveryCacheStorePort(ABC):
+    """Durable backing for the discovery cache so restarts start warm."""
+    @abstractmethod
+    def load_all(self) -> Dict[str, Dict[str, Any]]:
+        """Returns merchant_domain -> {"profile", "fresh_until", "stale_until"} (epoch seconds)."""
+        pass
+
+    @abstractmethod
+    def save(self, merchant_domain: str, record: Dict[str, Any]) -> None:
+        pass
+
+    @abstractmethod
+    def delete(self, merchant_domain: str) -> None:
+        pass
+
 class AuditPort(ABC):
     @abstractmethod
     def emit_event(self, event_type: str, data: Dict[str, Any]) -> None:
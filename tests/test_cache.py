@@ -0,0 +1,191 @@
+"""
+Tests for the bounded discovery cache.
+"""
+import asyncio
+import os
+import threading
+import time
+import pytest
+from talos_ucp_connector.adapters.infrastructure.persistence import FileDiscoveryCacheStore
+from talos_ucp_connector.domain.cache import DiscoveryCache, SingleFlight, AsyncSingleFlight
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def test_fresh_then_stale_then_expired():
+    timer = FakeTimer()
+    cache = DiscoveryCache(ttl=60, stale_ttl=120, timer=timer)
+    cache.put("merchant.com", {"v": 1})
+
+    entry = cache.get("merchant.com")
+    assert entry.value == {"v": 1}
+    assert not cache.is_stale(entry)
+
+    timer.now += 61
+    entry = cache.get("merchant.com")
+    assert entry.value == {"v": 1}
+    assert cache.is_stale(entry)
+
+    timer.now += 120
+    assert cache.get("merchant.com") is None
+    assert len(cache) == 0
+
+def test_lru_bound():
+    cache = DiscoveryCache(maxsize=2)
+    cache.put("a.com", {})
+    cache.put("b.com", {})
+    cache.get("a.com")
+    cache.put("c.com", {})
+
+    assert cache.get("b.com") is None
+    assert cache.get("a.com") is not None
+    assert len(cache) == 2
+
+def test_per_entry_ttl_override():
+    timer = FakeTimer()
+    cache = DiscoveryCache(ttl=300, stale_ttl=0, timer=timer)
+    cache.put("merchant.com", {}, ttl=10)
+
+    timer.now += 11
+    assert cache.get("merchant.com") is None
+
+def test_persisted_entries_survive_restart(tmp_path):
+    timer = FakeTimer()
+    store = FileDiscoveryCacheStore(str(tmp_path))
+    cache = DiscoveryCache(ttl=60, stale_ttl=120, timer=timer, store=store)
+    cache.put("fresh.com", {"v": "fresh"})
+    timer.now -= 1000
+    cache.put("gone.com", {"v": "gone"})
+    timer.now += 1000
+    cache.flush()
+
+    restarted = DiscoveryCache(ttl=60, stale_ttl=120, timer=timer, store=FileDiscoveryCacheStore(str(tmp_path)))
+
+    entry = restarted.get("fresh.com")
+    assert entry.value == {"v": "fresh"}
+    assert not restarted.is_stale(entry)
+    assert restarted.get("gone.com") is None
+
+    # The expired record was pruned from disk on load
+    assert list(FileDiscoveryCacheStore(str(tmp_path)).load_all()) == ["fresh.com"]
+
+def test_file_store_skips_corrupt_files(tmp_path):
+    store = FileDiscoveryCacheStore(str(tmp_path))
+    store.save("new.com", {"profile": {"v": 1}, "fresh_until": 10.0, "stale_until": 20.0})
+    (tmp_path / "broken.json").write_text("{not json")
+
+    records = store.load_all()
+
+    assert list(records) == ["new.com"]
+    assert records["new.com"]["profile"] == {"v": 1}
+    store.delete("new.com")
+    store.delete("new.com")
+    assert store.load_all() == {}
+
+def test_file_store_removes_malformed_records(tmp_path):
+    store = FileDiscoveryCacheStore(str(tmp_path))
+    store.save("good.com", {"profile": {"v": 1}, "fresh_until": 2000.0, "stale_until": 3000.0})
+    # Truncated / hand-edited records must not keep the process from starting
+    (tmp_path / "partial.json").write_text('{"merchant_domain": "a.com", "profile": {}}')
+    (tmp_path / "typed.json").write_text(
+        '{"merchant_domain": "b.com", "profile": [], "fresh_until": 1, "stale_until": 2}')
+
+    cache = DiscoveryCache(ttl=60, stale_ttl=120, timer=FakeTimer(), store=store)
+
+    assert cache.get("good.com").value == {"v": 1}
+    assert len(cache) == 1
+    assert sorted(p.name for p in tmp_path.iterdir()) == [os.path.basename(store._path("good.com"))]
+    cache.close()
+
+def test_store_writes_do_not_block_callers(tmp_path):
+    release = threading.Event()
+
+    class SlowStore(FileDiscoveryCacheStore):
+        def save(self, merchant_domain, record):
+            release.wait(2)
+            super().save(merchant_domain, record)
+
+    cache = DiscoveryCache(ttl=60, stale_ttl=120, timer=FakeTimer(), store=SlowStore(str(tmp_path)))
+    start = time.monotonic()
+    cache.put("merchant.com", {"v": 1})
+    assert time.monotonic() - start < 1
+    assert cache.get("merchant.com").value == {"v": 1}
+
+    release.set()
+    cache.flush()
+    assert list(FileDiscoveryCacheStore(str(tmp_path)).load_all()) == ["merchant.com"]
+    cache.close()
+
+def test_single_flight_coalesces_threads():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        started.set()
+        release.wait(2)
+        return {"endpoint": "https://api.merchant.com"}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("merchant.com", fetch))) for _ in range(8)]
+    threads[0].start()
+    assert started.wait(2)
+    for t in threads[1:]:
+        t.start()
+    # Let followers reach the wait before the leader finishes
+    time.sleep(0.05)
+    release.set()
+    for t in threads:
+        t.join(2)
+
+    assert len(calls) == 1
+    assert results == [{"endpoint": "https://api.merchant.com"}] * 8
+    assert flight._calls == {}
+
+def test_single_flight_shares_errors_and_resets():
+    flight = SingleFlight()
+
+    def boom():
+        raise RuntimeError("discovery failed")
+
+    with pytest.raises(RuntimeError):
+        flight.do("merchant.com", boom)
+    assert flight.do("merchant.com", lambda: "ok") == "ok"
+
+@pytest.mark.asyncio
+async def test_async_single_flight_coalesces_coroutines():
+    flight = AsyncSingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "profile"
+
+    results = await asyncio.gather(*(flight.do("merchant.com", fetch) for _ in range(50)))
+
+    assert results == ["profile"] * 50
+    assert len(calls) == 1
+    assert flight._tasks == {}
+
+@pytest.mark.asyncio
+async def test_async_single_flight_survives_waiter_cancellation():
+    flight = AsyncSingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0.02)
+        return "profile"
+
+    first = asyncio.create_task(flight.do("merchant.com", fetch))
+    await asyncio.sleep(0)
+    second = asyncio.create_task(flight.do("merchant.com", fetch))
+    await asyncio.sleep(0)
+    first.cancel()
+
+    assert await second == "profile"
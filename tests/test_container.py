@@ -0,0 +1,153 @@
+"""
+Tests for Container wiring and startup prewarm.
+"""
+import threading
+from unittest.mock import MagicMock
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+from talos_ucp_connector.bootstrap.container import Container
+from talos_ucp_connector.ports.spi import DiscoveredProfile
+
+def _config(**prewarm):
+    return {
+        "merchants": {
+            "a.example.com": {"policy": {}},
+            "b.example.com": {"policy": {}},
+            "slow.example.com": {"policy": {}},
+        },
+        "prewarm": prewarm,
+    }
+
+def _profile(endpoint):
+    return {"services": {"dev.ucp.shopping": {"rest": {"endpoint": endpoint}}}}
+
+def test_ready_immediately_without_prewarm():
+    container = Container(_config())
+    assert container.is_ready()
+    container.close()
+
+def test_prewarm_fills_cache_and_respects_deadline():
+    container = Container(_config(deadline_seconds=0.5))
+    release = threading.Event()
+
+    def fetch_profile(domain):
+        if domain == "slow.example.com":
+            release.wait(5)
+        if domain == "b.example.com":
+            raise RuntimeError("merchant down")
+        return _profile(f"https://api.{domain}/ucp")
+
+    container.discovery_adapter.discover = MagicMock(side_effect=lambda domain: DiscoveredProfile(fetch_profile(domain)))
+    endpoint_client = MagicMock()
+    container.http_clients.client_for = MagicMock(return_value=endpoint_client)
+
+    report = container.prewarm()
+    release.set()
+
+    assert container.is_ready()
+    assert report["warmed"] == ["a.example.com"]
+    assert report["failed"] == ["b.example.com"]
+    assert report["timed_out"] == ["slow.example.com"]
+    assert container.discovery_cache.get("a.example.com").value == _profile("https://api.a.example.com/ucp")
+    # Endpoint lives on another host, so its pool is opened too
+    container.http_clients.client_for.assert_any_call("https://api.a.example.com/ucp")
+    endpoint_client.head.assert_any_call("https://api.a.example.com/ucp")
+    container.close()
+
+def test_prewarm_opens_pool_for_cached_profiles():
+    config = _config()
+    config["merchants"] = {"a.example.com": {"policy": {}}}
+    container = Container(config)
+    # As if loaded from the persistent discovery cache: no discovery request
+    container.discovery_cache.put("a.example.com", _profile("https://a.example.com/ucp"))
+    container.discovery_adapter.discover = MagicMock()
+    endpoint_client = MagicMock()
+    container.http_clients.client_for = MagicMock(return_value=endpoint_client)
+
+    assert container.prewarm()["warmed"] == ["a.example.com"]
+    container.discovery_adapter.discover.assert_not_called()
+    endpoint_client.head.assert_called_once_with("https://a.example.com/ucp")
+    container.close()
+
+def test_prewarm_runs_in_background_when_enabled():
+    config = _config(enabled=True, open_connections=False)
+    config["merchants"] = {}
+    container = Container(config)
+
+    assert container.ready.wait(2)
+    assert container.prewarm_report["warmed"] == []
+    container.close()
+
+def _pem(private_key):
+    return private_key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption(),
+    ).decode("ascii")
+
+def test_eddsa_key_requires_eddsa_kid():
+    pem = _pem(ed25519.Ed25519PrivateKey.generate())
+    config = _config()
+    config["security"] = {"kid": "es-kid", "eddsa_private_key": pem}
+    with pytest.raises(ValueError, match="eddsa_kid"):
+        Container(config)
+
+    config["security"]["eddsa_kid"] = "ed-kid"
+    container = Container(config)
+    assert container.service._signers["EdDSA"][1] == "ed-kid"
+    container.close()
+
+def test_signers_registered_under_their_algorithm(tmp_path):
+    config = _config()
+    config["signing"] = {"sidecar_socket": str(tmp_path / "signer.sock"), "sidecar_algorithm": "EdDSA"}
+    config["security"] = {"kid": "es-kid", "eddsa_kid": "ed-kid"}
+    # An EdDSA sidecar leaves ES256 without a key
+    with pytest.raises(ValueError, match="ES256 key"):
+        Container(config)
+
+    config["security"]["private_key"] = _pem(ec.generate_private_key(ec.SECP256R1()))
+    container = Container(config)
+    signers = container.service._signers
+    assert signers["ES256"][0].algorithm == "ES256"
+    assert signers["EdDSA"] == (container.eddsa_signer, "ed-kid")
+    assert container.eddsa_signer.algorithm == "EdDSA"
+    container.close()
+
+def test_ed25519_primary_key_is_rejected():
+    config = _config()
+    config["signing"] = {"workers": 1}
+    config["security"] = {"private_key": _pem(ed25519.Ed25519PrivateKey.generate())}
+    with pytest.raises(ValueError, match="EC P-256"):
+        Container(config)
+
+def test_bloom_replay_runs_without_exact_store_unless_asked():
+    config = _config()
+    config["replay"] = {"bloom": {"capacity": 1_000}}
+    container = Container(config)
+    assert container.replay_store.exact is None
+    container.close()
+
+    config["replay"]["bloom"]["exact"] = True
+    container = Container(config)
+    assert container.replay_store.exact is not None
+    container.close()
+
+def test_bloom_replay_rejects_persistent_or_shared_store(tmp_path):
+    config = _config()
+    config["replay"] = {"bloom": {"exact": True}, "sqlite_path": str(tmp_path / "replay.db")}
+    with pytest.raises(ValueError, match="replay.bloom"):
+        Container(config)
+    # Rejected before the store (and its writer thread) is built
+    assert not (tmp_path / "replay.db").exists()
+    assert not any(t.name == "ucp-replay-writer" for t in threading.enumerate())
+
+    config["replay"] = {"bloom": {"capacity": 1_000}, "shared_memory": {"name": "ucp-test-unused"}}
+    with pytest.raises(ValueError, match="replay.bloom"):
+        Container(config)
+
+def test_close_stops_discovery_refresh_pool():
+    container = Container(_config())
+    container.close()
+    with pytest.raises(RuntimeError):
+        container.service._refresh_pool.submit(lambda: None)
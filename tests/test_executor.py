@@ -0,0 +1,128 @@
+"""
+Tests for the ServiceExecutor bridge used by the MCP tools.
+"""
+import asyncio
+import threading
+import time
+import pytest
+from talos_ucp_connector.adapters.inbound.executor import ServiceExecutor
+
+@pytest.mark.asyncio
+async def test_runs_off_event_loop():
+    executor = ServiceExecutor(max_workers=2, per_merchant_limit=2)
+    loop_thread = threading.get_ident()
+
+    result = await executor.run("merchant.com", lambda a, b=0: (threading.get_ident(), a + b), 1, b=2)
+
+    assert result[0] != loop_thread
+    assert result[1] == 3
+    assert executor.metrics()["completed"] == 1
+    executor.shutdown()
+
+@pytest.mark.asyncio
+async def test_per_merchant_cap_isolates_slow_merchant():
+    """A saturated merchant queues its own calls without starving others."""
+    executor = ServiceExecutor(max_workers=4, per_merchant_limit=2)
+    release = threading.Event()
+    active = {"slow.com": 0}
+    peak = {"slow.com": 0}
+    lock = threading.Lock()
+
+    def slow_call():
+        with lock:
+            active["slow.com"] += 1
+            peak["slow.com"] = max(peak["slow.com"], active["slow.com"])
+        release.wait(2)
+        with lock:
+            active["slow.com"] -= 1
+        return "slow"
+
+    slow = [asyncio.create_task(executor.run("slow.com", slow_call)) for _ in range(5)]
+    await asyncio.sleep(0.05)
+
+    metrics = executor.metrics()
+    assert metrics["running"] == 2
+    assert metrics["waiting_by_merchant"] == {"slow.com": 3}
+
+    # Another merchant still gets a worker while slow.com is saturated
+    start = time.monotonic()
+    assert await executor.run("fast.com", lambda: "fast") == "fast"
+    assert time.monotonic() - start < 1
+
+    release.set()
+    assert await asyncio.gather(*slow) == ["slow"] * 5
+    assert peak["slow.com"] == 2
+    assert executor.metrics()["waiting_by_merchant"] == {}
+    executor.shutdown()
+
+@pytest.mark.asyncio
+async def test_failures_are_counted_and_propagated():
+    executor = ServiceExecutor(max_workers=1, per_merchant_limit=1)
+
+    def boom():
+        raise ValueError("UCP_POLICY_DENIED")
+
+    with pytest.raises(ValueError, match="UCP_POLICY_DENIED"):
+        await executor.run("merchant.com", boom)
+
+    metrics = executor.metrics()
+    assert metrics["failed"] == 1
+    assert metrics["queued"] == 0
+    assert metrics["running"] == 0
+    executor.shutdown()
+
+@pytest.mark.asyncio
+async def test_cancelled_callers_keep_merchant_cap_until_calls_finish():
+    executor = ServiceExecutor(max_workers=8, per_merchant_limit=2)
+    release = threading.Event()
+    active = {"n": 0, "peak": 0}
+    lock = threading.Lock()
+
+    def slow_call():
+        with lock:
+            active["n"] += 1
+            active["peak"] = max(active["peak"], active["n"])
+        release.wait(2)
+        with lock:
+            active["n"] -= 1
+
+    # Callers give up (client disconnect / tool timeout) while their calls run
+    first = [asyncio.create_task(executor.run("slow.com", slow_call)) for _ in range(2)]
+    await asyncio.sleep(0.05)
+    for task in first:
+        task.cancel()
+    second = [asyncio.create_task(executor.run("slow.com", slow_call)) for _ in range(4)]
+    await asyncio.sleep(0.05)
+    assert active["n"] == 2
+
+    release.set()
+    await asyncio.gather(*second)
+    await asyncio.sleep(0.01)
+    assert active["peak"] == 2
+    assert executor.metrics()["queued"] == 0
+    # Idle merchants don't keep a semaphore around
+    assert executor._semaphores == {}
+    executor.shutdown()
+
+@pytest.mark.asyncio
+async def test_call_cancelled_before_starting_is_not_left_queued():
+    executor = ServiceExecutor(max_workers=1, per_merchant_limit=4)
+    release = threading.Event()
+
+    blocker = asyncio.create_task(executor.run("a.com", lambda: release.wait(2)))
+    await asyncio.sleep(0.05)
+    # Queued behind the only worker, then abandoned
+    pending = asyncio.create_task(executor.run("b.com", lambda: "never"))
+    await asyncio.sleep(0.05)
+    assert executor.metrics()["queued"] == 1
+    pending.cancel()
+    await asyncio.sleep(0.01)
+
+    release.set()
+    await blocker
+    await asyncio.sleep(0.01)
+    metrics = executor.metrics()
+    assert metrics["queued"] == 0
+    assert metrics["completed"] == 1
+    assert executor._semaphores == {}
+    executor.shutdown()
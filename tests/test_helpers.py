@@ -0,0 +1,101 @@
+"""
+Tests for envelope construction helpers.
+"""
+import pytest
+import rfc8785
+from talos_ucp_connector.domain.helpers import SigningHelper, RequestTemplate, EnvelopeCanonicalizer, CanonicalJSON
+
+def test_template_envelope_matches_full_envelope():
+    template = RequestTemplate.build("https://talos.example.com/profile", "https://api.merchant.com")
+    dynamic = {"Talos-Signature-Meta": 'iat=1700000000,jti="abc"', "Idempotency-Key": "idem-1"}
+    body = {"line_items": [{"id": "1"}], "currency": "USD"}
+
+    expected = SigningHelper.create_envelope(
+        method="post",
+        path="/checkout-sessions",
+        query_params={"b": "2", "a": "1"},
+        headers={**template.headers, **dynamic},
+        body=body,
+        iat=1700000000,
+        jti="abc"
+    )
+    actual = SigningHelper.create_envelope_from_template(
+        template=template,
+        method="post",
+        path="/checkout-sessions",
+        query_params={"b": "2", "a": "1"},
+        dynamic_headers=dynamic,
+        body=body,
+        iat=1700000000,
+        jti="abc"
+    )
+
+    assert actual == expected
+    assert actual["headers"]["ucp-agent"] == 'profile="https://talos.example.com/profile"'
+
+def test_template_is_not_mutated_by_requests():
+    template = RequestTemplate.build("talos-gateway", "https://api.merchant.com")
+    before = dict(template.signed_headers)
+
+    SigningHelper.create_envelope_from_template(
+        template, "GET", "/orders", {}, {"Talos-Signature-Meta": "x"}, None, 1, "j"
+    )
+
+    assert template.signed_headers == before
+    assert set(before) == {"ucp-agent", "content-type"}
+
+def _envelope(body, jti="2f1c", path="/checkout-sessions/cs_1"):
+    return {
+        "method": "PUT",
+        "path": path,
+        "query": "a=1&b=%C3%A9",
+        "headers": {
+            "ucp-agent": 'profile="https://talos.example.com"',
+            "content-type": "application/json",
+            "talos-signature-meta": f'iat=1700000000,jti="{jti}"',
+            "idempotency-key": "idem-é ",
+        },
+        "body": body,
+        "meta": {"iat": 1700000000, "jti": jti},
+    }
+
+def test_canonicalizer_matches_rfc8785_for_envelopes():
+    bodies = [
+        None,
+        {},
+        {"line_items": [{"id": str(i), "price": i * 100, "qty": 1.5} for i in range(50)], "currency": "USD"},
+        {"€": 1, "\U0001F600": [True, False, None], 'a"b': {"nested": {"x": -0.0, "y": 1e21}}},
+        {"דּ": "a", "\U00010000": "b"},  # UTF-16 order differs from code point order
+    ]
+    for idx, body in enumerate(bodies):
+        envelope = _envelope(body, jti=f"jti-{idx}")
+        assert EnvelopeCanonicalizer.dumps(envelope) == rfc8785.dumps(envelope)
+
+def test_canonicalizer_matches_rfc8785_for_arbitrary_objects():
+    samples = [
+        {},
+        {"method": "GET", "path": "/test"},
+        {"headers": {}, "body": {"k": "v"}},
+        {"headers": {"a": "1", "b": 2}},
+        {"headers": {"x": {"deep": "str"}}},
+        {"z": [1, "two", {"three": 3}], "\U0001F600": " "},
+    ]
+    for sample in samples:
+        assert EnvelopeCanonicalizer.dumps(sample) == rfc8785.dumps(sample)
+
+def test_canonicalizer_rejects_what_rfc8785_rejects():
+    with pytest.raises(rfc8785.CanonicalizationError):
+        EnvelopeCanonicalizer.dumps({1: "x"})
+    with pytest.raises(rfc8785.CanonicalizationError):
+        EnvelopeCanonicalizer.dumps({"path": "\ud800"})
+
+def test_canonical_body_is_spliced_verbatim():
+    body = {"line_items": [{"id": "1", "price": 1.5}], "currency": "USD"}
+    envelope = SigningHelper.create_envelope("post", "/checkout-sessions", {}, {}, body, 1700000000, "abc")
+    spliced = dict(envelope, body=CanonicalJSON.encode(body))
+
+    assert EnvelopeCanonicalizer.dumps(spliced) == rfc8785.dumps(envelope)
+
+def test_content_digest_matches_rfc9530_example():
+    # RFC 9530 section 2, example body
+    assert SigningHelper.content_digest(b'{"hello": "world"}') == "sha-256=:X48E9qOokqqrvdts8nOJRJN3OWDUoyWxBf7kbu9DBPE=:"
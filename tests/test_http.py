@@ -1,15 +1,25 @@
 """
 Tests for Outbound HTTP Adapters.
 """
+import json
 import pytest
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, AsyncMock
 import httpx
-from talos_ucp_connector.adapters.outbound.http import HttpDiscoveryAdapter, HttpMerchantCheckoutAdapter
+from talos_ucp_connector.adapters.outbound.http import (
+    HttpClientFactory,
+    HttpDiscoveryAdapter,
+    HttpMerchantCheckoutAdapter,
+    ProfileHttpCache,
+    AsyncHttpDiscoveryAdapter,
+    AsyncHttpMerchantCheckoutAdapter,
+)
+from talos_ucp_connector.ports.spi import DiscoveredProfile
 
 def test_discovery_adapter():
     mock_client = MagicMock(spec=httpx.Client)
     mock_response = MagicMock(spec=httpx.Response)
     mock_response.json.return_value = {"ucp": True}
+    mock_response.headers = httpx.Headers()
     mock_client.get.return_value = mock_response
     
     adapter = HttpDiscoveryAdapter(client=mock_client)
@@ -38,3 +48,208 @@ def test_merchant_adapter_headers():
     
     assert "Request-Id" in headers
     assert headers["UCP-Agent"] == "talos"
+
+@pytest.mark.asyncio
+async def test_async_discovery_adapter():
+    mock_client = MagicMock(spec=httpx.AsyncClient)
+    mock_response = MagicMock(spec=httpx.Response)
+    mock_response.json.return_value = {"ucp": True}
+    mock_response.headers = httpx.Headers()
+    mock_client.get = AsyncMock(return_value=mock_response)
+
+    adapter = AsyncHttpDiscoveryAdapter(client=mock_client)
+    res = await adapter.fetch_profile("merchant.com")
+
+    assert res == {"ucp": True}
+    mock_client.get.assert_awaited_with("https://merchant.com/.well-known/ucp")
+
+@pytest.mark.asyncio
+async def test_async_merchant_adapter_headers():
+    mock_client = MagicMock(spec=httpx.AsyncClient)
+    mock_response = MagicMock(spec=httpx.Response)
+    mock_response.json.return_value = {"items": [{"id": "o_1"}]}
+    mock_client.get = AsyncMock(return_value=mock_response)
+
+    adapter = AsyncHttpMerchantCheckoutAdapter(client=mock_client)
+    orders = await adapter.list_orders("https://api.com/orders", {"UCP-Agent": "talos"})
+
+    assert orders == [{"id": "o_1"}]
+    headers = mock_client.get.call_args[1]["headers"]
+    assert "Request-Id" in headers
+    assert headers["UCP-Agent"] == "talos"
+
+def test_merchant_pools_isolated_per_host():
+    factory = HttpClientFactory(
+        max_connections=20,
+        max_keepalive=10,
+        host_limits={"slow.example.com": {"max_connections": 2, "max_keepalive": 1}}
+    )
+    adapter = HttpMerchantCheckoutAdapter(client_factory=factory)
+
+    fast = adapter._client_for("https://fast.example.com/api/checkout-sessions")
+    slow = adapter._client_for("https://slow.example.com/api/checkout-sessions")
+
+    assert fast is not slow
+    assert fast is adapter._client_for("https://FAST.example.com/api/orders")
+    assert factory.sync_pools.limits_for("slow.example.com").max_connections == 2
+    assert factory.sync_pools.limits_for("slow.example.com").max_keepalive_connections == 1
+    assert factory.sync_pools.limits_for("fast.example.com").max_connections == 20
+
+    factory.close()
+    assert adapter._client_for("https://fast.example.com/api") is not fast
+    factory.close()
+
+def test_discovery_and_checkout_share_factory_pool():
+    """Discovery and checkout to the same host reuse one client and TLS context."""
+    factory = HttpClientFactory()
+    discovery = HttpDiscoveryAdapter(client_factory=factory)
+    checkout = HttpMerchantCheckoutAdapter(client_factory=factory)
+
+    profile_client = discovery.client_factory.client_for("https://merchant.com/.well-known/ucp")
+    checkout_client = checkout._client_for("https://merchant.com/api/shopping/v1/checkout-sessions")
+
+    assert profile_client is checkout_client
+    assert factory.ssl_context.minimum_version.name == "TLSv1_3"
+    factory.close()
+
+def test_injected_client_bypasses_pools():
+    mock_client = MagicMock(spec=httpx.Client)
+    adapter = HttpMerchantCheckoutAdapter(client=mock_client)
+
+    assert adapter._client_for("https://a.example.com/x") is mock_client
+    assert adapter._client_for("https://b.example.com/x") is mock_client
+
+def test_checkout_sends_signed_bytes_verbatim():
+    sent = []
+
+    def handler(request):
+        sent.append(request.content)
+        return httpx.Response(200, json={"id": "cs_1"})
+
+    adapter = HttpMerchantCheckoutAdapter(client=httpx.Client(transport=httpx.MockTransport(handler)))
+    signed = b'{"currency":"USD","line_items":[]}'
+
+    adapter.post_checkout("https://m.example.com/checkout-sessions", {"line_items": [], "currency": "USD"}, {}, content=signed)
+    adapter.put_checkout("https://m.example.com/checkout-sessions/cs_1", {"currency": "USD"}, {})
+
+    assert sent[0] == signed
+    # Without pre-encoded content the adapter falls back to encoding the payload
+    assert json.loads(sent[1]) == {"currency": "USD"}
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def _profile_server(responses):
+    """MockTransport that replays responses and records request headers."""
+    seen = []
+
+    def handler(request):
+        seen.append(request.headers)
+        return responses.pop(0)
+
+    return httpx.Client(transport=httpx.MockTransport(handler)), seen
+
+def test_discovery_honours_max_age_and_revalidates_with_304():
+    timer = FakeTimer()
+    client, seen = _profile_server([
+        httpx.Response(200, json={"v": 1}, headers={"Cache-Control": "max-age=60", "ETag": '"abc"'}),
+        httpx.Response(304, headers={"Cache-Control": "max-age=120"}),
+    ])
+    adapter = HttpDiscoveryAdapter(client=client, http_cache=ProfileHttpCache(timer=timer))
+
+    assert adapter.fetch_profile("merchant.com") == {"v": 1}
+    # Fresh: served without a request
+    timer.now += 30
+    assert adapter.fetch_profile("merchant.com") == {"v": 1}
+    assert len(seen) == 1
+
+    # Stale: conditional GET, 304 keeps the body and extends freshness
+    timer.now += 31
+    assert adapter.fetch_profile("merchant.com") == {"v": 1}
+    assert seen[1]["if-none-match"] == '"abc"'
+    timer.now += 100
+    assert adapter.fetch_profile("merchant.com") == {"v": 1}
+    assert len(seen) == 2
+
+def test_discovery_no_store_and_last_modified():
+    timer = FakeTimer()
+    client, seen = _profile_server([
+        httpx.Response(200, json={"v": 1}, headers={"Cache-Control": "no-store", "ETag": '"a"'}),
+        httpx.Response(200, json={"v": 2}, headers={"Last-Modified": "Wed, 21 Oct 2026 07:28:00 GMT"}),
+        httpx.Response(200, json={"v": 3}),
+    ])
+    adapter = HttpDiscoveryAdapter(client=client, http_cache=ProfileHttpCache(timer=timer))
+
+    assert adapter.fetch_profile("merchant.com") == {"v": 1}
+    assert adapter.fetch_profile("merchant.com") == {"v": 2}
+    assert "if-none-match" not in seen[1]
+    # No max-age: stored for revalidation only
+    assert adapter.fetch_profile("merchant.com") == {"v": 3}
+    assert seen[2]["if-modified-since"] == "Wed, 21 Oct 2026 07:28:00 GMT"
+
+@pytest.mark.asyncio
+async def test_async_discovery_revalidates():
+    timer = FakeTimer()
+    responses = [
+        httpx.Response(200, json={"v": 1}, headers={"Cache-Control": "max-age=10, public", "ETag": 'W/"x"'}),
+        httpx.Response(304),
+    ]
+    seen = []
+
+    def handler(request):
+        seen.append(request.headers)
+        return responses.pop(0)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    adapter = AsyncHttpDiscoveryAdapter(client=client, http_cache=ProfileHttpCache(timer=timer))
+
+    assert await adapter.fetch_profile("merchant.com") == {"v": 1}
+    timer.now += 11
+    assert await adapter.fetch_profile("merchant.com") == {"v": 1}
+    assert seen[1]["if-none-match"] == 'W/"x"'
+
+def test_discover_reports_merchant_freshness():
+    timer = FakeTimer()
+    client, _ = _profile_server([
+        httpx.Response(200, json={"v": 1}, headers={"Cache-Control": "max-age=30"}),
+        httpx.Response(200, json={"v": 2}, headers={"Cache-Control": "no-store"}),
+        httpx.Response(200, json={"v": 3}),
+    ])
+    adapter = HttpDiscoveryAdapter(client=client, http_cache=ProfileHttpCache(timer=timer))
+
+    assert adapter.discover("merchant.com") == DiscoveredProfile({"v": 1}, ttl=30.0)
+    timer.now += 10
+    # Served from the HTTP cache with the remaining lifetime
+    assert adapter.discover("merchant.com") == DiscoveredProfile({"v": 1}, ttl=20.0)
+    timer.now += 21
+    assert adapter.discover("merchant.com") == DiscoveredProfile({"v": 2}, cacheable=False)
+    # No freshness headers: the caller's default applies
+    assert adapter.discover("merchant.com") == DiscoveredProfile({"v": 3})
+
+def test_bare_304_keeps_stored_freshness():
+    timer = FakeTimer()
+    client, seen = _profile_server([
+        httpx.Response(200, json={"v": 1}, headers={"Cache-Control": "max-age=60", "ETag": '"a"', "Age": "10"}),
+        httpx.Response(304, headers={"ETag": '"a"'}),
+        httpx.Response(200, json={"v": 2}, headers={"Cache-Control": "no-cache", "ETag": '"b"'}),
+        httpx.Response(304, headers={"ETag": '"b"'}),
+    ])
+    adapter = HttpDiscoveryAdapter(client=client, http_cache=ProfileHttpCache(timer=timer))
+
+    assert adapter.discover("merchant.com") == DiscoveredProfile({"v": 1}, ttl=50.0)
+    timer.now += 51
+    # Stored max-age applies again, without the original response's Age
+    assert adapter.discover("merchant.com") == DiscoveredProfile({"v": 1}, ttl=60.0)
+    timer.now += 59
+    assert adapter.discover("merchant.com") == DiscoveredProfile({"v": 1}, ttl=1.0)
+    assert len(seen) == 2
+
+    timer.now += 2
+    assert adapter.discover("merchant.com") == DiscoveredProfile({"v": 2}, ttl=0.0)
+    # Still no-cache after the 304: never reported fresh
+    assert adapter.discover("merchant.com") == DiscoveredProfile({"v": 2}, ttl=0.0)
+    assert seen[3]["if-none-match"] == '"b"'
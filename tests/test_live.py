@@ -6,7 +6,9 @@ import pytest
 import asyncio
 from unittest.mock import MagicMock, patch
 from mcp.server.fastmcp import FastMCP
-from talos_ucp_connector.adapters.inbound.mcp_server import mcp, service
+import subprocess
+import sys
+from talos_ucp_connector.adapters.inbound import mcp_server
 
 # Mock merchant response
 MOCK_MERCHANT_PROFILE = {
@@ -41,6 +43,8 @@ async def test_live_checkout_flow():
     mock_client.post.return_value.json.return_value = MOCK_CHECKOUT_SESSION
     mock_client.post.return_value.status_code = 201
 
+    service = mcp_server.bootstrap().service
+
     # Inject Mock Client into Service Adapters
     # We need to replace the client on both adapters used by the service
     service.discovery.client = mock_client
@@ -64,3 +68,11 @@ async def test_live_checkout_flow():
     assert "Request-Signature" in post_args[1]["headers"]
     assert "UCP-Agent" in post_args[1]["headers"]
 
+
+def test_import_does_not_build_container():
+    """Spawned signing workers re-import the entry module; that must stay cheap."""
+    code = (
+        "from talos_ucp_connector.adapters.inbound import mcp_server as m; "
+        "assert m.container is None and m.service is None"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
@@ -2,18 +2,38 @@
 Tests for CommerceService domain logic.
 """
 import pytest
-from unittest.mock import MagicMock, ANY
-from talos_ucp_connector.domain.services import CommerceService
+import asyncio
+import threading
+from unittest.mock import MagicMock, AsyncMock, ANY
+from talos_ucp_connector.domain.cache import DiscoveryCache
+from talos_ucp_connector.domain.helpers import SigningHelper
+from talos_ucp_connector.domain.services import CommerceService, AsyncCommerceService
 from talos_ucp_connector.ports.spi import (
     MerchantCheckoutPort, DiscoveryPort, RequestSignerPort,
-    ClockPort, ReplayStorePort, ConfigStorePort, AuditPort, PaymentPort
+    ClockPort, ReplayStorePort, ConfigStorePort, AuditPort, PaymentPort,
+    AsyncMerchantCheckoutPort, AsyncDiscoveryPort, DiscoveredProfile
 )
 
+def _discovery_mock():
+    discovery = MagicMock(spec=DiscoveryPort)
+    # Like an adapter without caching hints: discover() wraps fetch_profile()
+    discovery.discover.side_effect = lambda domain: DiscoveredProfile(discovery.fetch_profile(domain))
+    return discovery
+
+def _async_discovery_mock():
+    discovery = AsyncMock(spec=AsyncDiscoveryPort)
+
+    async def discover(domain):
+        return DiscoveredProfile(await discovery.fetch_profile(domain))
+
+    discovery.discover.side_effect = discover
+    return discovery
+
 @pytest.fixture
 def mock_ports():
     return {
         "merchant_checkout": MagicMock(spec=MerchantCheckoutPort),
-        "discovery": MagicMock(spec=DiscoveryPort),
+        "discovery": _discovery_mock(),
         "signer": MagicMock(spec=RequestSignerPort),
         "clock": MagicMock(spec=ClockPort),
         "replay_store": MagicMock(spec=ReplayStorePort),
@@ -71,9 +91,14 @@ def test_create_checkout_flow(service, mock_ports):
     mock_ports["merchant_checkout"].post_checkout.assert_called_with(
         "https://api.merchant.com/checkout-sessions",
         {"line_items": [{"id": "1", "price": 100}], "currency": "USD", "mode": "payment"},
-        ANY  # Headers
+        ANY,  # Headers
+        content=b'{"currency":"USD","line_items":[{"id":"1","price":100}],"mode":"payment"}'
     )
 
+    # The signed envelope carries the very body bytes that were sent, not a copy
+    envelope = mock_ports["signer"].sign.call_args[0][0]
+    assert envelope["body"] is mock_ports["merchant_checkout"].post_checkout.call_args.kwargs["content"]
+
 def test_policy_denial(service, mock_ports):
     """Test fail-closed behavior for non-allowlisted merchants."""
     mock_ports["config_store"].is_merchant_allowlisted.return_value = False
@@ -92,5 +117,282 @@ def test_complete_checkout(service, mock_ports):
     mock_ports["merchant_checkout"].post_checkout.assert_called_with(
         "https://api.merchant.com/checkout-sessions/cs_123/complete",
         {"payment_data": {"token": "opaque_123"}},
-        ANY
+        ANY,
+        content=b'{"payment_data":{"token":"opaque_123"}}'
+    )
+
+@pytest.mark.parametrize("advertised, preference, expected", [
+    (["EdDSA", "ES256"], None, "es256"),
+    (["EdDSA"], None, "eddsa"),
+    (["EdDSA", "ES256"], ("EdDSA", "ES256"), "eddsa"),
+    (["ES256"], ("EdDSA", "ES256"), "es256"),
+    (None, None, "es256"),
+])
+def test_signing_algorithm_negotiated_from_profile(mock_ports, advertised, preference, expected):
+    """The preferred advertised alg we hold a key for wins; ES256 is the fallback."""
+    profile = {"services": {"dev.ucp.shopping": {"rest": {"endpoint": "https://api.merchant.com"}}}}
+    if advertised is not None:
+        profile["request_signing"] = {"algorithms": advertised}
+    mock_ports["discovery"].fetch_profile.return_value = profile
+    mock_ports["config_store"].is_merchant_allowlisted.return_value = True
+    mock_ports["clock"].now.return_value = 1700000000
+    mock_ports["signer"].sign.return_value = "es256..sig"
+    eddsa_signer = MagicMock(spec=RequestSignerPort)
+    eddsa_signer.sign.return_value = "eddsa..sig"
+    mock_ports["merchant_checkout"].get_checkout.return_value = {"id": "cs_1"}
+
+    service = CommerceService(
+        **mock_ports,
+        platform_profile_uri="https://talos.example.com",
+        signing_kid="es-key",
+        eddsa_signer=eddsa_signer,
+        eddsa_kid="ed-key",
+        **({"signing_preference": preference} if preference else {})
     )
+    service.get_checkout("merchant.com", "cs_1")
+
+    headers = mock_ports["merchant_checkout"].get_checkout.call_args[0][1]
+    assert headers["Request-Signature"] == f"{expected}..sig"
+    if expected == "eddsa":
+        assert eddsa_signer.sign.call_args[0][1] == "ed-key"
+        mock_ports["signer"].sign.assert_not_called()
+    else:
+        assert mock_ports["signer"].sign.call_args[0][1] == "es-key"
+        eddsa_signer.sign.assert_not_called()
+
+def test_eddsa_signer_requires_its_own_kid(mock_ports):
+    with pytest.raises(ValueError, match="eddsa_kid"):
+        CommerceService(
+            **mock_ports,
+            platform_profile_uri="https://talos.example.com",
+            signing_kid="es-key",
+            eddsa_signer=MagicMock(spec=RequestSignerPort)
+        )
+
+def test_content_digest_mode_signs_digest_instead_of_body(service, mock_ports):
+    """Merchants advertising content_digest get a signed Content-Digest; the body is still sent."""
+    mock_ports["discovery"].fetch_profile.return_value = {
+        "services": {"dev.ucp.shopping": {"rest": {"endpoint": "https://api.merchant.com"}}},
+        "request_signing": {"content_digest": ["sha-256"]}
+    }
+    mock_ports["merchant_checkout"].post_checkout.return_value = {"id": "cs_123"}
+
+    service.create_checkout("merchant.com", [{"id": "1", "price": 100}], "USD")
+
+    _, payload, headers = mock_ports["merchant_checkout"].post_checkout.call_args[0]
+    content = mock_ports["merchant_checkout"].post_checkout.call_args.kwargs["content"]
+    envelope = mock_ports["signer"].sign.call_args[0][0]
+    assert content == b'{"currency":"USD","line_items":[{"id":"1","price":100}],"mode":"payment"}'
+    assert envelope["body"] is None
+    assert envelope["headers"]["content-digest"] == SigningHelper.content_digest(content)
+    assert headers["Content-Digest"] == envelope["headers"]["content-digest"]
+
+@pytest.fixture
+def async_service(mock_ports):
+    mock_ports["merchant_checkout"] = AsyncMock(spec=AsyncMerchantCheckoutPort)
+    mock_ports["discovery"] = _async_discovery_mock()
+    mock_ports["discovery"].fetch_profile.return_value = {
+        "services": {
+            "dev.ucp.shopping": {
+                "rest": {"endpoint": "https://api.merchant.com"}
+            }
+        }
+    }
+    mock_ports["config_store"].is_merchant_allowlisted.return_value = True
+    mock_ports["clock"].now.return_value = 1700000000
+    mock_ports["signer"].sign_async.return_value = "header..sig"
+
+    return AsyncCommerceService(
+        **mock_ports,
+        platform_profile_uri="https://talos.example.com",
+        signing_kid="test-key"
+    )
+
+@pytest.mark.asyncio
+async def test_async_create_checkout_flow(async_service, mock_ports):
+    """Async service drives the same signed flow through awaitable ports."""
+    mock_ports["merchant_checkout"].post_checkout.return_value = {"id": "cs_123"}
+
+    result = await async_service.create_checkout("merchant.com", [{"id": "1", "price": 100}], "USD")
+
+    assert result == {"id": "cs_123"}
+    mock_ports["discovery"].fetch_profile.assert_awaited_once_with("merchant.com")
+    mock_ports["merchant_checkout"].post_checkout.assert_awaited_with(
+        "https://api.merchant.com/checkout-sessions",
+        {"line_items": [{"id": "1", "price": 100}], "currency": "USD", "mode": "payment"},
+        ANY,
+        content=b'{"currency":"USD","line_items":[{"id":"1","price":100}],"mode":"payment"}'
+    )
+    mock_ports["signer"].sign_async.assert_awaited_once()
+    mock_ports["signer"].sign.assert_not_called()
+    headers = mock_ports["merchant_checkout"].post_checkout.call_args[0][2]
+    assert headers["Request-Signature"] == "header..sig"
+    assert "Idempotency-Key" in headers
+
+@pytest.mark.asyncio
+async def test_async_requests_run_concurrently(async_service, mock_ports):
+    """A slow merchant must not serialize other in-flight checkouts."""
+    in_flight = 0
+    peak = 0
+
+    async def slow_get(url, headers):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return {"id": url.rsplit("/", 1)[-1]}
+
+    mock_ports["merchant_checkout"].get_checkout.side_effect = slow_get
+
+    results = await asyncio.gather(*(
+        async_service.get_checkout("merchant.com", f"cs_{i}") for i in range(20)
+    ))
+
+    assert [r["id"] for r in results] == [f"cs_{i}" for i in range(20)]
+    assert peak == 20
+
+@pytest.mark.asyncio
+async def test_async_policy_denial(async_service, mock_ports):
+    mock_ports["config_store"].is_merchant_allowlisted.return_value = False
+
+    with pytest.raises(ValueError, match="UCP_POLICY_DENIED"):
+        await async_service.create_checkout("evil.com", [], "USD")
+
+def _profile(endpoint):
+    return {"services": {"dev.ucp.shopping": {"rest": {"endpoint": endpoint}}}}
+
+def test_stale_endpoint_served_while_refreshing(mock_ports):
+    """A stale entry is returned immediately; the refresh happens off the request path."""
+    timer = [1000.0]
+    cache = DiscoveryCache(ttl=60, stale_ttl=600, timer=lambda: timer[0])
+    svc = CommerceService(
+        **mock_ports,
+        platform_profile_uri="https://talos.example.com",
+        signing_kid="test-key",
+        discovery_cache=cache
+    )
+    refreshed = threading.Event()
+
+    def fetch(domain):
+        if mock_ports["discovery"].fetch_profile.call_count > 1:
+            refreshed.set()
+            return _profile("https://new.merchant.com")
+        return _profile("https://old.merchant.com")
+
+    mock_ports["discovery"].fetch_profile.side_effect = fetch
+
+    assert svc._get_base_url("merchant.com") == "https://old.merchant.com"
+    timer[0] += 61
+    assert svc._get_base_url("merchant.com") == "https://old.merchant.com"
+    assert refreshed.wait(2)
+    svc._refresh_pool.shutdown(wait=True)
+    assert svc._get_base_url("merchant.com") == "https://new.merchant.com"
+
+def test_refresh_failure_keeps_stale_entry(mock_ports):
+    timer = [1000.0]
+    cache = DiscoveryCache(ttl=60, stale_ttl=600, timer=lambda: timer[0])
+    cache.put("merchant.com", _profile("https://old.merchant.com"))
+    mock_ports["discovery"].fetch_profile.side_effect = RuntimeError("merchant down")
+    svc = CommerceService(
+        **mock_ports,
+        platform_profile_uri="https://talos.example.com",
+        signing_kid="test-key",
+        discovery_cache=cache
+    )
+
+    timer[0] += 61
+    assert svc._get_base_url("merchant.com") == "https://old.merchant.com"
+    svc._refresh_pool.shutdown(wait=True)
+
+    mock_ports["audit"].emit_event.assert_any_call("UCP_DISCOVERY_REFRESH_FAILURE", ANY)
+    assert cache.get("merchant.com").value == _profile("https://old.merchant.com")
+
+def test_closed_service_serves_stale_without_refreshing(mock_ports):
+    timer = [1000.0]
+    cache = DiscoveryCache(ttl=60, stale_ttl=600, timer=lambda: timer[0])
+    cache.put("merchant.com", _profile("https://old.merchant.com"))
+    svc = CommerceService(
+        **mock_ports,
+        platform_profile_uri="https://talos.example.com",
+        signing_kid="test-key",
+        discovery_cache=cache
+    )
+    svc.close()
+
+    timer[0] += 61
+    assert svc._get_base_url("merchant.com") == "https://old.merchant.com"
+    mock_ports["discovery"].fetch_profile.assert_not_called()
+    assert not svc._refreshing
+
+@pytest.mark.asyncio
+async def test_async_stale_endpoint_refreshes_in_background(async_service, mock_ports):
+    timer = [1000.0]
+    async_service._discovery_cache = DiscoveryCache(ttl=60, stale_ttl=600, timer=lambda: timer[0])
+    mock_ports["discovery"].fetch_profile.side_effect = [
+        _profile("https://old.merchant.com"),
+        _profile("https://new.merchant.com"),
+    ]
+
+    assert await async_service._get_base_url("merchant.com") == "https://old.merchant.com"
+    timer[0] += 61
+    assert await async_service._get_base_url("merchant.com") == "https://old.merchant.com"
+    await asyncio.gather(*async_service._refresh_tasks.values())
+    assert await async_service._get_base_url("merchant.com") == "https://new.merchant.com"
+
+def test_cold_merchant_discovery_is_single_flight(service, mock_ports):
+    """Concurrent cold callers share one /.well-known/ucp fetch."""
+    gate = threading.Event()
+    profile = mock_ports["discovery"].fetch_profile.return_value
+
+    def slow_fetch(domain):
+        gate.wait(2)
+        return profile
+
+    mock_ports["discovery"].fetch_profile.side_effect = slow_fetch
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(service._get_base_url("merchant.com"))) for _ in range(10)]
+    for t in threads:
+        t.start()
+    while mock_ports["discovery"].fetch_profile.call_count == 0:
+        pass
+    gate.set()
+    for t in threads:
+        t.join(2)
+
+    assert results == ["https://api.merchant.com"] * 10
+    assert mock_ports["discovery"].fetch_profile.call_count == 1
+
+@pytest.mark.asyncio
+async def test_async_cold_merchant_discovery_is_single_flight(async_service, mock_ports):
+    async def slow_fetch(domain):
+        await asyncio.sleep(0.01)
+        return _profile("https://api.merchant.com")
+
+    mock_ports["discovery"].fetch_profile.side_effect = slow_fetch
+
+    results = await asyncio.gather(*(async_service._get_base_url("merchant.com") for _ in range(25)))
+
+    assert results == ["https://api.merchant.com"] * 25
+    assert mock_ports["discovery"].fetch_profile.await_count == 1
+
+def test_merchant_cache_headers_reach_discovery_cache(mock_ports):
+    timer = [1000.0]
+    cache = DiscoveryCache(ttl=300, stale_ttl=600, timer=lambda: timer[0])
+    svc = CommerceService(
+        **mock_ports,
+        platform_profile_uri="https://talos.example.com",
+        signing_kid="test-key",
+        discovery_cache=cache
+    )
+    mock_ports["discovery"].discover.side_effect = [
+        DiscoveredProfile(_profile("https://a.merchant.com"), ttl=30),
+        DiscoveredProfile(_profile("https://b.merchant.com"), cacheable=False),
+    ]
+
+    svc._load_profile("merchant.com")
+    assert cache.get("merchant.com").fresh_until == 1030
+    # no-store drops the cached profile rather than replacing it
+    assert svc._load_profile("merchant.com") == _profile("https://b.merchant.com")
+    assert cache.get("merchant.com") is None
+    svc._refresh_pool.shutdown(wait=True)
@@ -0,0 +1,176 @@
+"""
+Tests for the Unix-socket signing sidecar and its batching client.
+"""
+import asyncio
+import base64
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+import pytest
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.hazmat.primitives.asymmetric.utils import encode_dss_signature
+from talos_ucp_connector.adapters.infrastructure.security import RequestSigner
+from talos_ucp_connector.adapters.infrastructure.sidecar import (
+    SidecarRequestSigner,
+    SidecarSigningError,
+    SigningSidecar,
+    encode_frame,
+    read_frame,
+)
+
+def _verify(public_key, envelope, kid, sig):
+    header_b64, signing_input = RequestSigner.signing_input(envelope, kid)
+    sig_header, sig_b64 = sig.split("..")
+    assert sig_header == header_b64
+    raw = base64.urlsafe_b64decode(sig_b64 + "==")
+    der = encode_dss_signature(int.from_bytes(raw[:32], "big"), int.from_bytes(raw[32:], "big"))
+    public_key.verify(der, signing_input, ec.ECDSA(hashes.SHA256()))
+
+@pytest.fixture
+def sidecar():
+    private_key = ec.generate_private_key(ec.SECP256R1())
+    pem = private_key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption()
+    ).decode("ascii")
+    # Short path: Unix socket paths are limited to ~100 bytes
+    directory = tempfile.mkdtemp(prefix="ucp-")
+    socket_path = os.path.join(directory, "signer.sock")
+
+    server = SigningSidecar({"kid-1": RequestSigner(pem)})
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+    task_holder = {}
+
+    def run():
+        asyncio.set_event_loop(loop)
+        task_holder["task"] = loop.create_task(server.serve(socket_path, ready))
+        try:
+            loop.run_until_complete(task_holder["task"])
+        except asyncio.CancelledError:
+            pass
+        finally:
+            # Let connection handlers finish before the loop goes away
+            pending = asyncio.all_tasks(loop)
+            for task in pending:
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            loop.close()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    assert ready.wait(5)
+
+    signer = SidecarRequestSigner(socket_path, batch_window=0.005)
+    yield signer, private_key.public_key()
+
+    signer.close()
+    loop.call_soon_threadsafe(task_holder["task"].cancel)
+    thread.join(5)
+    shutil.rmtree(directory, ignore_errors=True)
+
+def test_sign_round_trip(sidecar):
+    signer, public_key = sidecar
+    envelope = {"method": "POST", "body": {"foo": "bar"}}
+
+    _verify(public_key, envelope, "kid-1", signer.sign(envelope, "kid-1"))
+
+def test_concurrent_requests_are_batched_and_pipelined(sidecar):
+    signer, public_key = sidecar
+    envelopes = [{"method": "GET", "path": f"/orders/{i}"} for i in range(150)]
+
+    sigs = signer.sign_many(envelopes, "kid-1")
+
+    for envelope, sig in zip(envelopes, sigs):
+        _verify(public_key, envelope, "kid-1", sig)
+    # 150 envelopes in max_batch=64 frames, not 150 round trips
+    assert next(signer._ids) <= 4
+
+@pytest.mark.asyncio
+async def test_async_signing_and_errors(sidecar):
+    signer, public_key = sidecar
+    envelopes = [{"method": "GET", "path": f"/orders/{i}"} for i in range(5)]
+
+    sigs = await asyncio.gather(*(signer.sign_async(e, "kid-1") for e in envelopes))
+    for envelope, sig in zip(envelopes, sigs):
+        _verify(public_key, envelope, "kid-1", sig)
+
+    with pytest.raises(SidecarSigningError, match="unknown kid"):
+        await signer.sign_async(envelopes[0], "missing")
+
+def test_sidecar_rejects_alg_that_does_not_match_the_key(sidecar):
+    signer, _ = sidecar
+    eddsa = SidecarRequestSigner(signer.socket_path, algorithm="EdDSA", timeout=2)
+    try:
+        with pytest.raises(SidecarSigningError, match="does not match the ES256 key"):
+            eddsa.sign({"method": "GET"}, "kid-1")
+    finally:
+        eddsa.close()
+
+def test_stale_reader_does_not_fail_frames_on_the_new_connection(sidecar):
+    signer, public_key = sidecar
+    old = signer._connection()
+    # The writer's failed sendall drops the connection and the next batch reconnects
+    signer._drop_connection(old, BrokenPipeError())
+    current = signer._connection()
+    assert current is not old
+    in_flight = Future()
+    with signer._lock:
+        signer._inflight[-1] = [in_flight]
+
+    # Only now does the old reader notice
+    signer._drop_connection(old, ConnectionError("EOF"))
+    assert not in_flight.done()
+    assert signer._sock is current
+    _verify(public_key, {"method": "GET"}, "kid-1", signer.sign({"method": "GET"}, "kid-1"))
+
+def test_unavailable_sidecar_fails_fast():
+    signer = SidecarRequestSigner("/nonexistent/ucp-signer.sock", timeout=2)
+    with pytest.raises(SidecarSigningError, match="unavailable"):
+        signer.sign({"method": "GET"}, "kid-1")
+    signer.close()
+
+def _scripted_sidecar(directory, responses):
+    """Serves one connection per scripted response, then waits for the client to hang up."""
+    socket_path = os.path.join(directory, "signer.sock")
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(socket_path)
+    listener.listen()
+
+    def serve():
+        with listener:
+            for respond in responses:
+                conn, _ = listener.accept()
+                with conn:
+                    conn.sendall(encode_frame(respond(read_frame(conn))))
+                    conn.recv(1)
+
+    threading.Thread(target=serve, daemon=True).start()
+    return socket_path
+
+def test_malformed_responses_drop_the_connection_and_reconnect():
+    directory = tempfile.mkdtemp(prefix="ucp-")
+    socket_path = _scripted_sidecar(directory, [
+        lambda request: {"signatures": ["sig"]},
+        lambda request: {"id": request["id"], "signatures": []},
+        lambda request: {"id": request["id"], "signatures": ["sig"]},
+    ])
+    signer = SidecarRequestSigner(socket_path, max_batch=1, batch_window=0, timeout=2)
+    try:
+        # Missing id and a short signature list both fail fast instead of timing out
+        for _ in range(2):
+            start = time.monotonic()
+            with pytest.raises(SidecarSigningError):
+                signer.sign({"method": "GET"}, "kid-1")
+            assert time.monotonic() - start < 1
+
+        assert signer.sign({"method": "GET"}, "kid-1").endswith("..sig")
+    finally:
+        signer.close()
+        shutil.rmtree(directory, ignore_errors=True)
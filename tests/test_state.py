@@ -0,0 +1,239 @@
+"""
+Tests for the in-memory replay store.
+"""
+import multiprocessing
+import sqlite3
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import shared_memory
+import pytest
+from talos_ucp_connector.adapters.infrastructure.state import (
+    BloomReplayFilter,
+    InMemoryReplayStore,
+    ShardedReplayStore,
+    SharedMemoryReplayStore,
+    SqliteReplayStore,
+)
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def test_replay_detected_within_ttl():
+    store = InMemoryReplayStore(ttl_seconds=600, timer=FakeTimer())
+
+    assert store.check_and_store_nonce("m.com", "kid-1", "jti-1")
+    assert not store.check_and_store_nonce("m.com", "kid-1", "jti-1")
+    # Scoped by merchant and kid
+    assert store.check_and_store_nonce("other.com", "kid-1", "jti-1")
+    assert store.check_and_store_nonce("m.com", "kid-2", "jti-1")
+
+def test_expired_nonces_are_dropped_in_order():
+    timer = FakeTimer()
+    store = InMemoryReplayStore(ttl_seconds=600, timer=timer)
+    for i in range(1000):
+        timer.now = 1000 + i * 0.5
+        store.check_and_store_nonce("m.com", "kid-1", f"jti-{i}")
+    assert len(store) == 1000
+
+    # jti-0 .. jti-499 expire (expiry 1600 .. 1849.5 < 1850)
+    timer.now = 1850
+    assert store.check_and_store_nonce("m.com", "kid-1", "fresh")
+    assert len(store) == 501
+    assert not store.check_and_store_nonce("m.com", "kid-1", "jti-999")
+    # An expired nonce is accepted again
+    assert store.check_and_store_nonce("m.com", "kid-1", "jti-0")
+
+    timer.now += 10_000
+    assert store.check_and_store_nonce("m.com", "kid-1", "last")
+    assert len(store) == 1
+
+def test_sharded_store_accepts_each_nonce_once_under_contention():
+    store = ShardedReplayStore(ttl_seconds=600, shards=8)
+    accepted = []
+    barrier = threading.Barrier(8)
+
+    def worker():
+        barrier.wait()
+        # Every thread races on the same 2000 nonces
+        accepted.append(sum(store.check_and_store_nonce("m.com", "kid-1", f"jti-{i}") for i in range(2000)))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sum(accepted) == 2000
+    assert len(store) == 2000
+    # Keys are spread over the shards
+    assert all(len(shard) > 0 for shard in store.shards)
+
+def test_sharded_store_requires_power_of_two():
+    with pytest.raises(ValueError):
+        ShardedReplayStore(shards=6)
+
+def test_bloom_filter_rejects_replays_without_exact_store():
+    timer = FakeTimer()
+    bloom = BloomReplayFilter(ttl_seconds=600, capacity=10_000, timer=timer)
+
+    assert bloom.check_and_store_nonce("m.com", "kid-1", "jti-1")
+    assert not bloom.check_and_store_nonce("m.com", "kid-1", "jti-1")
+    assert bloom.check_and_store_nonce("m.com", "kid-2", "jti-1")
+
+    # Still remembered until the TTL has fully passed, then forgotten
+    timer.now += 599
+    assert not bloom.check_and_store_nonce("m.com", "kid-1", "jti-1")
+    timer.now += 150 * 2
+    assert bloom.check_and_store_nonce("m.com", "kid-1", "jti-1")
+    assert bloom.metrics()["generations"] <= 5
+
+def test_bloom_filter_defers_suspected_replays_to_exact_store():
+    timer = FakeTimer()
+    exact = InMemoryReplayStore(ttl_seconds=600, timer=timer)
+    # Tiny filter so false positives are guaranteed
+    bloom = BloomReplayFilter(ttl_seconds=600, capacity=1, false_positive_rate=0.5, slices=1,
+                              exact=exact, timer=timer)
+
+    accepted = sum(bloom.check_and_store_nonce("m.com", "kid-1", f"jti-{i}") for i in range(500))
+    assert accepted == 500
+    assert len(exact) == 500
+    assert not bloom.check_and_store_nonce("m.com", "kid-1", "jti-7")
+
+    metrics = bloom.metrics()
+    assert metrics["checks"] == 501
+    assert metrics["false_positives"] > 0
+    assert metrics["suspected"] == metrics["false_positives"] + 1
+
+def test_bloom_filter_with_exact_store_accepts_each_nonce_once_under_threads():
+    exact = ShardedReplayStore(ttl_seconds=600)
+    bloom = BloomReplayFilter(ttl_seconds=600, capacity=64, false_positive_rate=0.1, slices=1,
+                              stripes=8, exact=exact)
+    nonces = [f"jti-{i}" for i in range(2_000)] * 4
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        results = list(pool.map(lambda jti: bloom.check_and_store_nonce("m.com", "kid-1", jti), nonces))
+
+    assert sum(results) == 2_000
+    assert bloom.metrics()["checks"] == 8_000
+
+def test_bloom_filter_false_positive_rate_and_size():
+    bloom = BloomReplayFilter(ttl_seconds=600, capacity=20_000, false_positive_rate=1e-3, slices=1,
+                              timer=FakeTimer())
+    # Every nonce is fresh, so each rejection is a false positive
+    rejected = sum(not bloom.check_and_store_nonce("m.com", "kid-1", f"jti-{i}") for i in range(25_000))
+    assert rejected <= 50
+    # A few bytes per nonce, vs hundreds for an exact store
+    assert bloom.metrics()["bytes"] < 20_000 * 4
+
+def test_sqlite_store_survives_restart(tmp_path):
+    timer = FakeTimer()
+    path = str(tmp_path / "replay.db")
+    store = SqliteReplayStore(path, ttl_seconds=600, timer=timer)
+    assert store.check_and_store_nonce("m.com", "kid-1", "jti-1")
+    assert not store.check_and_store_nonce("m.com", "kid-1", "jti-1")
+    store.close()
+
+    store = SqliteReplayStore(path, ttl_seconds=600, timer=timer)
+    try:
+        assert not store.check_and_store_nonce("m.com", "kid-1", "jti-1")
+        assert store.check_and_store_nonce("m.com", "kid-2", "jti-1")
+        # An expired row is accepted again
+        timer.now += 601
+        assert store.check_and_store_nonce("m.com", "kid-1", "jti-1")
+    finally:
+        store.close()
+
+def test_sqlite_store_group_commits_concurrent_checks(tmp_path):
+    store = SqliteReplayStore(str(tmp_path / "replay.db"), ttl_seconds=600)
+    try:
+        nonces = [f"jti-{i % 500}" for i in range(2000)]
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            accepted = list(pool.map(lambda jti: store.check_and_store_nonce("m.com", "kid-1", jti), nonces))
+        assert sum(accepted) == 500
+    finally:
+        store.close()
+
+def test_sqlite_store_bulk_expires_rows(tmp_path):
+    timer = FakeTimer()
+    path = str(tmp_path / "replay.db")
+    store = SqliteReplayStore(path, ttl_seconds=600, cleanup_interval=30, timer=timer)
+    try:
+        for i in range(100):
+            store.check_and_store_nonce("m.com", "kid-1", f"jti-{i}")
+        timer.now += 700
+        store.check_and_store_nonce("m.com", "kid-1", "fresh")
+    finally:
+        store.close()
+
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT jti FROM replay_nonces").fetchall() == [("fresh",)]
+        assert conn.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+
+@pytest.fixture
+def shm_store_args(tmp_path):
+    return {"name": f"ucp-test-{uuid.uuid4().hex[:12]}", "lock_path": str(tmp_path / "replay.lock")}
+
+def _check_in_worker(args, nonces):
+    store = SharedMemoryReplayStore(capacity=1000, **args)
+    try:
+        return sum(store.check_and_store_nonce("m.com", "kid-1", jti) for jti in nonces)
+    finally:
+        store.close()
+
+def test_shared_memory_store_is_shared_across_processes(shm_store_args):
+    store = SharedMemoryReplayStore(capacity=1000, **shm_store_args)
+    try:
+        assert store.check_and_store_nonce("m.com", "kid-1", "seen")
+        nonces = ["seen"] + [f"jti-{i}" for i in range(300)]
+        with multiprocessing.get_context("spawn").Pool(4) as pool:
+            # Every worker races on the same nonces
+            accepted = pool.starmap(_check_in_worker, [(shm_store_args, nonces)] * 4)
+        assert sum(accepted) == 300
+        assert len(store) == 301
+    finally:
+        store.close()
+        store.unlink()
+
+def test_shared_memory_store_expires_and_rejects_full_buckets(shm_store_args):
+    timer = FakeTimer()
+    # A single bucket of four slots
+    store = SharedMemoryReplayStore(ttl_seconds=600, capacity=1, ways=4, timer=timer, **shm_store_args)
+    try:
+        assert store.buckets == 1
+        for i in range(4):
+            assert store.check_and_store_nonce("m.com", "kid-1", f"jti-{i}")
+        assert not store.check_and_store_nonce("m.com", "kid-1", "jti-0")
+        # Full of live nonces: fail closed
+        assert not store.check_and_store_nonce("m.com", "kid-1", "jti-4")
+
+        timer.now += 601
+        assert store.check_and_store_nonce("m.com", "kid-1", "jti-4")
+        assert store.check_and_store_nonce("m.com", "kid-1", "jti-0")
+        assert len(store) == 2
+    finally:
+        store.close()
+        store.unlink()
+
+class _UntrackedSharedMemory(shared_memory.SharedMemory):
+    """Accepts Python 3.13's `track` argument on older interpreters."""
+    def __init__(self, name=None, create=False, size=0, track=True):
+        super().__init__(name=name, create=create, size=size)
+
+@pytest.mark.parametrize("track_kwarg", [False, True])
+def test_shared_memory_store_attaches_twice_in_one_process(shm_store_args, monkeypatch, track_kwarg):
+    if track_kwarg:
+        monkeypatch.setattr(shared_memory, "SharedMemory", _UntrackedSharedMemory)
+    first = SharedMemoryReplayStore(capacity=1000, **shm_store_args)
+    second = SharedMemoryReplayStore(capacity=1000, **shm_store_args)
+    try:
+        assert first.check_and_store_nonce("m.com", "kid-1", "jti-1")
+        assert not second.check_and_store_nonce("m.com", "kid-1", "jti-1")
+    finally:
+        second.close()
+        first.close()
+        first.unlink()
@@ -0,0 +1,132 @@
+"""
+Tests for merchant signature verification and the per-kid key cache.
+"""
+import base64
+from unittest.mock import MagicMock
+import httpx
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+from talos_ucp_connector.adapters.infrastructure.security import RequestSigner, Ed25519RequestSigner
+from talos_ucp_connector.adapters.outbound.http import HttpDiscoveryAdapter, ProfileHttpCache
+from talos_ucp_connector.adapters.infrastructure.verification import MerchantKeyCache, SignatureVerifier
+from talos_ucp_connector.ports.spi import DiscoveredProfile, DiscoveryPort
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+def _pem(private_key) -> str:
+    return private_key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption()
+    ).decode("ascii")
+
+def _ec_jwk(private_key, kid):
+    numbers = private_key.public_key().public_numbers()
+    return {"kty": "EC", "crv": "P-256", "kid": kid,
+            "x": _b64(numbers.x.to_bytes(32, "big")), "y": _b64(numbers.y.to_bytes(32, "big"))}
+
+def _ed_jwk(private_key, kid):
+    raw = private_key.public_key().public_bytes(serialization.Encoding.Raw, serialization.PublicFormat.Raw)
+    return {"kty": "OKP", "crv": "Ed25519", "kid": kid, "x": _b64(raw)}
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def merchant():
+    ec_key = ec.generate_private_key(ec.SECP256R1())
+    ed_key = ed25519.Ed25519PrivateKey.generate()
+    discovery = MagicMock(spec=DiscoveryPort)
+    discovery.discover.return_value = DiscoveredProfile({
+        "signing_keys": [_ec_jwk(ec_key, "m-es"), _ed_jwk(ed_key, "m-ed"), {"kty": "RSA", "kid": "ignored"}]
+    })
+    timer = FakeTimer()
+    cache = MerchantKeyCache(discovery, ttl=300, min_refresh_interval=30, timer=timer)
+    return {
+        "es": RequestSigner(_pem(ec_key)),
+        "ed": Ed25519RequestSigner(_pem(ed_key)),
+        "discovery": discovery,
+        "timer": timer,
+        "verifier": SignatureVerifier(cache),
+    }
+
+def test_verifies_es256_and_eddsa_with_cached_keys(merchant):
+    envelope = {"status": 200, "body": {"id": "cs_1"}}
+    verifier = merchant["verifier"]
+
+    for _ in range(3):
+        assert verifier.verify("m.com", merchant["es"].sign(envelope, "m-es"), envelope)
+        assert verifier.verify("m.com", merchant["ed"].sign(envelope, "m-ed"), envelope)
+
+    # One JWKS fetch serves every verification within the TTL
+    merchant["discovery"].discover.assert_called_once_with("m.com", revalidate=False)
+
+def test_rejects_tampering_and_alg_confusion(merchant):
+    envelope = {"status": 200, "body": {"id": "cs_1"}}
+    verifier = merchant["verifier"]
+    sig = merchant["es"].sign(envelope, "m-es")
+
+    assert not verifier.verify("m.com", sig, {"status": 200, "body": {"id": "cs_2"}})
+    assert not verifier.verify("m.com", "garbage", envelope)
+    # ES256 header pointing at the Ed25519 key
+    assert not verifier.verify("m.com", merchant["es"].sign(envelope, "m-ed"), envelope)
+    assert not verifier.verify("m.com", merchant["es"].sign(envelope, "unknown"), envelope)
+
+def test_verify_bytes_checks_raw_payload(merchant):
+    body = b'{"event":"order.updated","id":"ord_1"}'
+    header_b64, _ = Ed25519RequestSigner.signing_input({}, "m-ed")
+    sig = f"{header_b64}..{merchant['ed'].sign_input(f'{header_b64}.{_b64(body)}'.encode('ascii'))}"
+
+    assert merchant["verifier"].verify_bytes("m.com", sig, body)
+    assert not merchant["verifier"].verify_bytes("m.com", sig, body + b" ")
+
+def test_unknown_kid_refetch_is_rate_limited_and_ttl_expires(merchant):
+    verifier, discovery, timer = merchant["verifier"], merchant["discovery"], merchant["timer"]
+    envelope = {"status": 200}
+
+    verifier.verify("m.com", merchant["es"].sign(envelope, "rotated"), envelope)
+    verifier.verify("m.com", merchant["es"].sign(envelope, "rotated"), envelope)
+    assert discovery.discover.call_count == 1
+
+    timer.now = 31
+    verifier.verify("m.com", merchant["es"].sign(envelope, "rotated"), envelope)
+    assert discovery.discover.call_count == 2
+    # Keys held but the kid is unknown: ask the merchant, not a cached profile
+    discovery.discover.assert_called_with("m.com", revalidate=True)
+
+    timer.now = 400
+    assert verifier.verify("m.com", merchant["es"].sign(envelope, "m-es"), envelope)
+    assert discovery.discover.call_count == 3
+
+def test_rotated_kid_bypasses_fresh_http_cache():
+    old_key, new_key = ec.generate_private_key(ec.SECP256R1()), ec.generate_private_key(ec.SECP256R1())
+    responses = [
+        httpx.Response(200, json={"signing_keys": [_ec_jwk(old_key, "k1")]},
+                       headers={"Cache-Control": "max-age=3600", "ETag": '"v1"'}),
+        httpx.Response(200, json={"signing_keys": [_ec_jwk(old_key, "k1"), _ec_jwk(new_key, "k2")]},
+                       headers={"Cache-Control": "max-age=3600", "ETag": '"v2"'}),
+    ]
+    seen = []
+
+    def handler(request):
+        seen.append(request.headers)
+        return responses.pop(0)
+
+    timer = FakeTimer()
+    discovery = HttpDiscoveryAdapter(client=httpx.Client(transport=httpx.MockTransport(handler)),
+                                     http_cache=ProfileHttpCache(timer=timer))
+    verifier = SignatureVerifier(MerchantKeyCache(discovery, ttl=300, min_refresh_interval=30, timer=timer))
+    envelope = {"status": 200}
+
+    assert verifier.verify("m.com", RequestSigner(_pem(old_key)).sign(envelope, "k1"), envelope)
+    timer.now = 31
+    # The profile is still fresh in the HTTP cache, but the new kid is found
+    assert verifier.verify("m.com", RequestSigner(_pem(new_key)).sign(envelope, "k2"), envelope)
+    assert len(seen) == 2
+    assert seen[1]["if-none-match"] == '"v1"'